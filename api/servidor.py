@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+
+KEEPALIVE_SECONDS = 15.0
+MAX_BUFFER = 64 * 1024  # Bytes pendientes por cliente antes de desconectarlo por lento
+
+
+class OccupancyServer:
+    """
+    Servidor HTTP local (asyncio, sin dependencias) con la ocupación por sección para letreros y la app:
+      GET /ocupacion         -> JSON con todas las secciones
+      GET /ocupacion/stream  -> Server-Sent Events: primero el estado completo, luego solo las secciones que cambian
+    publish() se puede llamar desde cualquier hilo. Los cambios que llegan dentro de coalesce segundos se envían
+    juntos en un solo evento, codificado una vez y escrito a todos los clientes.
+    """
+    def __init__(self, host="0.0.0.0", port=8080, coalesce=0.25):
+        self.host = host
+        self.port = port
+        self.coalesce = coalesce
+        self.state = {}        # sección -> {"ocupados", "capacidad", "disponibles"}
+        self.dirty = set()     # Secciones cambiadas desde el último envío
+        self.clients = set()   # StreamWriter de los clientes SSE conectados
+        self.loop = None
+        self.server = None
+        self._flush_scheduled = False
+        self._ready = threading.Event()
+
+    def start(self):
+        """Levanta el servidor en un hilo propio. Retorna self."""
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait(5.0)
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as error:
+            print(f"No se pudo abrir la API de ocupación en el puerto {self.port}: {error}")
+            self._ready.set()
+            return
+        print(f"API de ocupación en http://{self.host}:{self.port}/ocupacion")
+        self.loop.create_task(self._keepalive())
+        self._ready.set()
+        self.loop.run_forever()
+
+    def publish(self, sections):
+        """Actualiza secciones {nombre: {"ocupados", "capacidad"}}. Seguro desde cualquier hilo."""
+        if self.loop is None or not self.loop.is_running():
+            self._apply(sections)  # Antes de arrancar solo se guarda el estado
+            return
+        self.loop.call_soon_threadsafe(self._apply, sections)
+
+    def _apply(self, sections):
+        for name, section in sections.items():
+            value = dict(section, disponibles=section["capacidad"] - section["ocupados"])
+            if self.state.get(name) != value:
+                self.state[name] = value
+                self.dirty.add(name)
+        if self.dirty and not self._flush_scheduled and self.loop is not None:
+            self._flush_scheduled = True
+            self.loop.call_later(self.coalesce, self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if not self.dirty:
+            return
+        changed = {name: self.state[name] for name in self.dirty}
+        self.dirty.clear()
+        self._broadcast(self._event(changed))
+
+    @staticmethod
+    def _event(data):
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+    def _broadcast(self, payload):
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                # Cliente que no lee: se desconecta en vez de acumular memoria
+                self.clients.discard(writer)
+                writer.close()
+                continue
+            writer.write(payload)
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE_SECONDS)
+            self._broadcast(b": ping\n\n")
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10.0)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        parts = request.split(b" ", 2)
+        method = parts[0]
+        path = parts[1].split(b"?")[0].decode("latin-1") if len(parts) > 1 else ""
+
+        if method != b"GET":
+            self._respond(writer, "405 Method Not Allowed", b"")
+        elif path == "/ocupacion":
+            body = json.dumps(self.state, ensure_ascii=False).encode("utf-8")
+            self._respond(writer, "200 OK", body, "application/json; charset=utf-8")
+        elif path == "/ocupacion/stream":
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\n"
+            )
+            writer.write(self._event(self.state))
+            self.clients.add(writer)
+            try:
+                # El cliente no envía nada más; se espera a que cierre la conexión
+                while await reader.read(1024):
+                    pass
+            except ConnectionError:
+                pass
+            finally:
+                self.clients.discard(writer)
+                writer.close()
+            return
+        else:
+            self._respond(writer, "404 Not Found", b"")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    @staticmethod
+    def _respond(writer, status, body, content_type="text/plain"):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+
+
+def setup_api(settings):
+    """Levanta la API según la configuración ("habilitado", "host", "puerto"). Retorna el servidor o None."""
+    if not settings.get("habilitado", True):
+        return None
+    return OccupancyServer(settings["host"], settings["puerto"]).start()
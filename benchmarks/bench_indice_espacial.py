@@ -0,0 +1,64 @@
+"""
+Micro-benchmark del índice de cruces recientes.
+Compara RecentCrossingIndex con la búsqueda lineal original sobre un deque de diccionarios,
+variando el tráfico (cruces por segundo) y la ventana de tiempo.
+
+Uso: python benchmarks/bench_indice_espacial.py
+"""
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camara.indice_espacial import RecentCrossingIndex
+
+
+class LinearScan:
+    """Implementación original de check_line_crossing: deque de 100 diccionarios recorrido completo."""
+    def __init__(self, radius=20, window=1.0, maxlen=100):
+        self.radius = radius
+        self.window = window
+        self.tracks = deque(maxlen=maxlen)
+
+    def query(self, x, y, timestamp):
+        for track in self.tracks:
+            if (abs(track['center_x'] - x) < self.radius and
+                abs(track['center_y'] - y) < self.radius and
+                timestamp - track['timestamp'] < self.window):
+                return True
+        return False
+
+    def insert(self, x, y, timestamp):
+        self.tracks.append({'center_x': x, 'center_y': y, 'timestamp': timestamp})
+
+
+def run(index, events):
+    start = time.perf_counter()
+    for x, y, timestamp in events:
+        if not index.query(x, y, timestamp):
+            index.insert(x, y, timestamp)
+    return (time.perf_counter() - start) / len(events) * 1e6  # µs por consulta
+
+
+def make_events(rate, seconds=20, width=640, height=360, seed=0):
+    rng = random.Random(seed)
+    count = int(rate * seconds)
+    return [(rng.uniform(0, width), rng.uniform(0, height), i / rate) for i in range(count)]
+
+
+def main():
+    print(f"{'cruces/s':>9} {'ventana s':>10} {'lineal µs':>10} {'índice µs':>10} {'aceleración':>12}")
+    for rate in (10, 50, 200):
+        for window in (1.0, 5.0, 30.0):
+            events = make_events(rate)
+            capacity = max(256, int(rate * window * 2))
+            linear = run(LinearScan(window=window, maxlen=capacity), events)
+            indexed = run(RecentCrossingIndex(window=window, capacity=capacity), events)
+            print(f"{rate:>9} {window:>10.1f} {linear:>10.2f} {indexed:>10.2f} {linear / indexed:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
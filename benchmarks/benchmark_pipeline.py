@@ -0,0 +1,188 @@
+"""
+Benchmark del pipeline de detección y conteo sobre clips de referencia.
+Para cada combinación de tamaño de modelo, backend, detecciones por segundo y confianza procesa
+los clips del manifiesto y reporta FPS, percentiles de latencia por fotograma, uso de CPU y memoria
+y el error de conteo contra las entradas/salidas reales. Cada corrida se agrega como una línea JSON
+al archivo de resultados para poder comparar en el tiempo.
+
+Manifiesto (JSON):
+    [{"video": "clips/acceso_tarde.mp4", "entradas": 12, "salidas": 9, "camara": "Acceso principal"}]
+
+Uso:
+    python benchmarks/benchmark_pipeline.py benchmarks/clips.json --tamanos n m --backends torch onnx
+        --hz 3 5 10 --conf 0.5 0.6 [--resultados benchmarks/resultados.jsonl]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camara.cargador import ModelLoader
+from camara.inferencia import InferenceEngine, ALLOWED_CLASSES
+from camara.arranque import create_pipeline
+from config import CONFIG_PATH, load_config, load_cameras
+
+
+def run_clip(engine, camera, clip, detection_hz):
+    """Procesa un clip completo en tiempo del video. Retorna latencias (s), fotogramas leídos, entradas y salidas."""
+    # Mismo armado que las cámaras en vivo (frecuencias activa/inactiva, filtro, ROI), sin capturas del stream principal
+    pipeline = create_pipeline(
+        camera, engine, detection_hz=detection_hz, main_url=None, name=os.path.basename(clip["video"])
+    )
+    pipeline.sampler.backoff = 0  # Mismas muestras en todas las configuraciones
+    latencies = []
+    cap = cv2.VideoCapture(clip["video"])
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        started = time.perf_counter()
+        result = pipeline.process_frame(frame, frame_index / fps)
+        if result is not None:
+            latencies.append(time.perf_counter() - started)
+        frame_index += 1
+    cap.release()
+    return latencies, frame_index, pipeline.entries, pipeline.exits
+
+
+def run_configuration(engine, cameras, clips, detection_hz):
+    latencies = []
+    frames = 0
+    errors = []
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for clip in clips:
+        camera = cameras.get(clip.get("camara")) or next(iter(cameras.values()))
+        clip_latencies, clip_frames, entries, exits = run_clip(engine, camera, clip, detection_hz)
+        latencies.extend(clip_latencies)
+        frames += clip_frames
+        errors.append({
+            "video": clip["video"],
+            "entradas": entries, "entradas_reales": clip["entradas"],
+            "salidas": exits, "salidas_reales": clip["salidas"],
+            "error_absoluto": abs(entries - clip["entradas"]) + abs(exits - clip["salidas"]),
+        })
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    latencies_ms = np.array(latencies or [0.0]) * 1000
+    expected = sum(clip["entradas"] + clip["salidas"] for clip in clips)
+    return {
+        "fotogramas": frames,
+        "fotogramas_procesados": len(latencies),
+        "fps_lectura": frames / wall if wall else 0.0,
+        "fps_procesados": len(latencies) / wall if wall else 0.0,
+        "latencia_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p90": float(np.percentile(latencies_ms, 90)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "max": float(latencies_ms.max()),
+        },
+        "cpu_porcentaje": 100.0 * cpu / wall if wall else 0.0,
+        # Cada modelo corre en su propio proceso (ver benchmark_model): el pico es el de esta configuración
+        # de modelo y no el del modelo más grande medido antes; memoria_mb es el RSS al terminar la corrida
+        "memoria_max_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "memoria_mb": current_rss_mb(),
+        "error_conteo": sum(item["error_absoluto"] for item in errors),
+        "error_relativo": sum(item["error_absoluto"] for item in errors) / expected if expected else 0.0,
+        "clips": errors,
+    }
+
+
+def current_rss_mb():
+    """Memoria residente actual del proceso (Linux, /proc/self/statm); None si no está disponible."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def benchmark_model(size, backend, int8, cameras, clips, hz_values, conf_values):
+    """
+    Mide todas las combinaciones de Hz y confianza de un modelo. Se ejecuta en un proceso nuevo por modelo,
+    así la memoria reportada no arrastra el pico de los modelos medidos antes.
+    Retorna (backend, [(configuración, métricas)]) o (None, error).
+    """
+    loader = ModelLoader(size, backend, int8=int8).start()
+    if not loader.wait():
+        return None, str(loader.error)
+    engine = InferenceEngine(loader.model, classes=ALLOWED_CLASSES, max_batch=1, max_wait=0)
+    results = []
+    for detection_hz, conf in itertools.product(hz_values, conf_values):
+        engine.conf = conf
+        metrics = run_configuration(engine, cameras, clips, detection_hz)
+        results.append(({
+            "tamano": size, "backend": loader.backend, "int8": int8, "deteccion_hz": detection_hz, "conf": conf,
+        }, metrics))
+    engine.stop()
+    return loader.backend, results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de rendimiento y precisión del conteo.")
+    parser.add_argument("manifiesto", help="JSON con los clips y sus conteos reales")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Configuración con las líneas de cada cámara")
+    parser.add_argument("--tamanos", nargs="+", default=["m"], help="Tamaños de modelo (n, s, m)")
+    parser.add_argument("--backends", nargs="+", default=["torch"], help="Backends (torch, onnx, openvino)")
+    parser.add_argument("--int8", action="store_true", help="Usar modelos cuantizados INT8")
+    parser.add_argument("--hz", nargs="+", type=float, default=[5.0], help="Detecciones por segundo objetivo (las frecuencias activa e inactiva salen de la cámara configurada)")
+    parser.add_argument("--conf", nargs="+", type=float, default=[0.6], help="Umbrales de confianza")
+    parser.add_argument("--resultados", default="benchmarks/resultados.jsonl", help="Archivo JSON Lines de salida")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.manifiesto, "r", encoding="utf-8") as file:
+        clips = json.load(file)
+    cameras = {camera["nombre"]: camera for camera in load_cameras(load_config(args.config))}
+    run = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "equipo": {"cpu": platform.processor() or platform.machine(), "nucleos": os.cpu_count(), "python": platform.python_version()},
+    }
+
+    with open(args.resultados, "a", encoding="utf-8") as output:
+        for size, backend in itertools.product(args.tamanos, args.backends):
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                loaded_backend, results = pool.submit(
+                    benchmark_model, size, backend, args.int8, cameras, clips, args.hz, args.conf
+                ).result()
+            if loaded_backend is None:
+                print(f"Se omite yolov8{size}/{backend}: {results}")
+                continue
+            for configuration, metrics in results:
+                record = dict(run, configuracion=configuration, **metrics)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                print(f"yolov8{size} {loaded_backend} {configuration['deteccion_hz']:g} Hz conf={configuration['conf']}: "
+                      f"{metrics['fps_procesados']:.1f} FPS, p50 {metrics['latencia_ms']['p50']:.1f} ms, "
+                      f"p99 {metrics['latencia_ms']['p99']:.1f} ms, memoria {metrics['memoria_max_mb']:.0f} MB, "
+                      f"error {metrics['error_conteo']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
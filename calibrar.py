@@ -0,0 +1,51 @@
+"""
+Calibración del detector para este equipo.
+Mide combinaciones de tamaño de modelo, tamaño de entrada, hilos de torch y backend contra un presupuesto de
+latencia por fotograma y guarda la más precisa que lo cumple como perfil del equipo. La aplicación, headless.py
+y los procesos de inferencia cargan ese perfil solos (modelo.perfil en config.json); si un equipo no tiene
+perfil, la aplicación lo calibra la primera vez que carga el modelo. Este script recalibra a pedido,
+por ejemplo después de cambiar de hardware o de instalar OpenVINO.
+
+Uso:
+    python calibrar.py [--presupuesto-ms 150] [--tamanos m s n] [--imgsz 640 512 416 320] [--hilos 8 4]
+        [--backends torch onnx openvino] [--video clip.mp4] [--corridas 8]
+"""
+import argparse
+
+from camara.calibracion import IMGSZ, PERFIL_PATH, calibrate, hardware_key, sample_frames, save_profile
+from config import CONFIG_PATH, load_config, load_model_settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Elige la configuración del detector más rápida para este equipo.")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración JSON")
+    parser.add_argument("--presupuesto-ms", type=float, help="Latencia máxima por fotograma (p95, por defecto la de la configuración)")
+    parser.add_argument("--tamanos", nargs="+", default=["m", "s", "n"], help="Tamaños de modelo, del más preciso al más rápido")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=list(IMGSZ), help="Tamaños de entrada del detector")
+    parser.add_argument("--hilos", nargs="+", type=int, help="Hilos de torch a probar (por defecto todos y la mitad)")
+    parser.add_argument("--backends", nargs="+", help="Backends a probar (por defecto el de la configuración o, con \"auto\", los instalados)")
+    parser.add_argument("--video", help="Clip o URL de cámara para tomar los fotogramas de prueba")
+    parser.add_argument("--corridas", type=int, default=8, help="Fotogramas medidos por combinación")
+    parser.add_argument("--perfil", default=PERFIL_PATH, help="Archivo donde se guardan los perfiles por equipo")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_settings = load_model_settings(load_config(args.config))
+    budget_ms = args.presupuesto_ms or model_settings["presupuesto_ms"]
+    backends = args.backends or (None if model_settings["backend"] == "auto" else [model_settings["backend"]])
+    print(f"Equipo: {hardware_key()}")
+    profile = calibrate(
+        budget_ms, sizes=args.tamanos, imgszs=args.imgsz, threads=args.hilos, backends=backends,
+        int8=model_settings["int8"], frames=sample_frames(args.video), runs=args.corridas
+    )
+    save_profile(profile, args.perfil)
+    status = "dentro del presupuesto" if profile["dentro_presupuesto"] else "ninguna cumple el presupuesto, se usa la más rápida"
+    print(f"Perfil: yolov8{profile['tamano']} {profile['backend']} {profile['imgsz']}px hilos={profile['hilos'] or '-'} "
+          f"p95={profile['p95_ms']}ms ({status}) -> {args.perfil}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
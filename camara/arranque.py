@@ -0,0 +1,53 @@
+from camara.calibracion import PERFIL_PATH, apply_profile, load_matching_profile
+from camara.cargador import ModelLoader
+from camara.inferencia import InferenceEngine
+from camara.pipeline import StreamPipeline
+from camara.procesos import ProcessInferenceEngine
+
+
+def create_detector(model_settings, detection, metrics=None):
+    """
+    Cargador del detector según la configuración (load_model_settings y load_detection_settings), sin iniciar.
+    Con procesos > 0 es un ProcessInferenceEngine, que hace de cargador y de motor, con el perfil guardado ya
+    aplicado (los procesos no calibran). Si no, un ModelLoader que aplica el perfil o calibra al cargar.
+    Se inicia con start() y se espera con wait() o add_done_callback(); luego create_engine() da el motor.
+    """
+    if model_settings["procesos"] > 0:
+        profile = load_matching_profile(model_settings) if model_settings["perfil"] else None
+        return ProcessInferenceEngine(
+            apply_profile(model_settings, profile), workers=model_settings["procesos"],
+            timeout=model_settings["tiempo_limite"], conf=detection["conf"], classes=detection["clases"],
+            metrics=metrics, profile=profile
+        )
+    return ModelLoader(
+        model_settings["tamano"], model_settings["backend"], int8=model_settings["int8"],
+        imgsz=model_settings["imgsz"], threads=model_settings["hilos"],
+        profile_path=PERFIL_PATH if model_settings["perfil"] else None, budget_ms=model_settings["presupuesto_ms"]
+    )
+
+
+def create_engine(loader, detection, metrics=None):
+    """Motor de inferencia de un cargador ya listo: el mismo ProcessInferenceEngine o un InferenceEngine sobre su modelo."""
+    if isinstance(loader, ProcessInferenceEngine):
+        return loader
+    return InferenceEngine(
+        loader.model, conf=detection["conf"], classes=detection["clases"], imgsz=loader.imgsz, metrics=metrics
+    )
+
+
+def create_pipeline(camera, engine, profile=None, metrics=None, **options):
+    """
+    StreamPipeline de una cámara configurada (diccionario de load_cameras) sobre el motor compartido.
+    options reemplaza o agrega argumentos del pipeline, por ejemplo on_entry, on_exit, on_frame o name.
+    """
+    arguments = dict(
+        detection_hz=camera["deteccion_hz"], name=camera["nombre"],
+        lines=camera["lineas"], zones=camera["zonas"],
+        roi=camera["roi"], roi_padding=camera["roi_padding"], motion_gate=camera["filtro_movimiento"],
+        active_hz=camera["deteccion_hz_activa"], idle_hz=camera["deteccion_hz_inactiva"],
+        main_url=camera["url_principal"], snapshot_dir=camera["directorio_capturas"],
+        expected_latency=profile["p50_ms"] / 1000 if profile else None,
+        reference_size=camera["resolucion_referencia"], metrics=metrics,
+    )
+    arguments.update(options)
+    return StreamPipeline(camera["url"], engine, camera["left_line"], camera["right_line"], **arguments)
@@ -0,0 +1,91 @@
+import importlib.util
+import os
+
+# Orden de preferencia en CPU: el primero disponible es el más rápido
+BACKENDS = ("openvino", "onnx", "torch")
+MODEL_SIZES = ("n", "s", "m")
+
+
+def available_backends():
+    """Backends de inferencia instalados en este equipo, en orden de preferencia."""
+    found = []
+    if importlib.util.find_spec("openvino") is not None:
+        found.append("openvino")
+    if importlib.util.find_spec("onnxruntime") is not None:
+        found.append("onnx")
+    found.append("torch")
+    return found
+
+
+def _cuda_available():
+    import torch
+    return torch.cuda.is_available()
+
+
+def select_backend(backend="auto"):
+    """
+    Resuelve "auto": con GPU conviene PyTorch en CUDA; en CPU, OpenVINO u ONNX Runtime si están instalados.
+    """
+    if backend != "auto":
+        if backend not in available_backends():
+            raise ValueError(f"Backend '{backend}' no disponible. Instalados: {', '.join(available_backends())}")
+        return backend
+    if _cuda_available():
+        return "torch"
+    return available_backends()[0]
+
+
+def _quantize_onnx(onnx_path):
+    """Cuantización dinámica INT8 de los pesos con ONNX Runtime."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    int8_path = onnx_path.replace(".onnx", "_int8.onnx")
+    if not os.path.exists(int8_path):
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def export_model(size="m", backend="onnx", int8=False, imgsz=640, weights_dir="."):
+    """
+    Exporta yolov8{size}.pt al formato del backend (solo la primera vez) y retorna la ruta del modelo exportado.
+    Se exporta con batch dinámico para que el InferenceEngine pueda enviar micro-lotes.
+    """
+    from ultralytics import YOLO
+
+    weights = os.path.join(weights_dir, f"yolov8{size}.pt")
+    stem = os.path.splitext(weights)[0]
+    if backend == "openvino":
+        exported = f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+        if not os.path.exists(exported):
+            exported = YOLO(weights).export(format="openvino", int8=int8, imgsz=imgsz, dynamic=True)
+        return str(exported)
+    if backend == "onnx":
+        exported = f"{stem}.onnx"
+        if not os.path.exists(exported):
+            exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True)
+        return _quantize_onnx(str(exported)) if int8 else str(exported)
+    return weights
+
+
+def load_detector(size="m", backend="auto", int8=False, imgsz=640, weights_dir="."):
+    """
+    Carga el detector YOLO con el backend pedido o el más rápido disponible.
+    Retorna (modelo, nombre_del_backend); el modelo se usa igual sin importar el backend.
+    INT8 solo existe para ONNX Runtime y OpenVINO: con PyTorch (también "auto" en un equipo con CUDA)
+    el modelo corre en FP32 y se avisa.
+    """
+    from ultralytics import YOLO
+
+    if size not in MODEL_SIZES:
+        raise ValueError(f"Tamaño de modelo '{size}' no soportado. Opciones: {', '.join(MODEL_SIZES)}")
+    backend = select_backend(backend)
+    if backend == "torch":
+        device = 'cuda' if _cuda_available() else 'cpu'
+        print(f"Usando dispositivo: {device.upper()}")
+        if int8:
+            print("Aviso: INT8 no está disponible con el backend PyTorch; el modelo corre en FP32. "
+                  "Use backend \"onnx\" u \"openvino\" para INT8")
+        return YOLO(os.path.join(weights_dir, f"yolov8{size}.pt")).to(device), backend
+
+    path = export_model(size, backend, int8=int8, imgsz=imgsz, weights_dir=weights_dir)
+    print(f"Usando backend: {backend.upper()}{' INT8' if int8 else ''} ({path})")
+    return YOLO(path, task="detect"), backend
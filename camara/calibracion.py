@@ -0,0 +1,189 @@
+import json
+import os
+import platform
+import time
+from datetime import datetime
+
+import numpy as np
+
+from camara.backends import MODEL_SIZES, available_backends, load_detector
+
+PERFIL_PATH = "perfil_detector.json"
+IMGSZ = (640, 512, 416, 320)
+
+
+def hardware_key():
+    """Identifica el equipo: CPU, hilos lógicos, GPU y backends instalados. Cambiar cualquiera invalida el perfil."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as cpuinfo:
+            cpu = next(line.split(":", 1)[1].strip() for line in cpuinfo if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    gpu = "cpu"
+    try:
+        import torch
+        if torch.cuda.is_available():
+            gpu = torch.cuda.get_device_name(0)
+    except ImportError:
+        pass
+    return f"{cpu} | {os.cpu_count()} hilos | {gpu} | {','.join(available_backends())}"
+
+
+def load_profile(file_path=PERFIL_PATH, key=None):
+    """Perfil guardado para este equipo, o None si nunca se calibró aquí."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            profiles = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return profiles.get(key or hardware_key())
+
+
+def save_profile(profile, file_path=PERFIL_PATH, key=None):
+    """Guarda el perfil del equipo sin tocar los de otros equipos en el mismo archivo."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            profiles = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        profiles = {}
+    profiles[key or hardware_key()] = profile
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(profiles, file, indent=4, ensure_ascii=False)
+
+
+def profile_matches(profile, int8=False, backend="auto"):
+    """
+    True si el perfil se calibró para la configuración actual: mismo INT8 y, si la configuración fija un
+    backend, ese mismo backend. Un perfil de otra configuración no se aplica; se vuelve a calibrar.
+    """
+    return profile is not None and profile.get("int8", False) == int8 and backend in ("auto", profile["backend"])
+
+
+def load_matching_profile(model_settings, file_path=PERFIL_PATH):
+    """Perfil del equipo si coincide con el INT8 y el backend de model_settings (load_model_settings), o None."""
+    profile = load_profile(file_path)
+    if profile is not None and not profile_matches(profile, model_settings["int8"], model_settings["backend"]):
+        print("El perfil del detector se calibró con otro backend o INT8; se ignora hasta recalibrar (calibrar.py)")
+        return None
+    return profile
+
+
+def apply_profile(model_settings, profile):
+    """Configuración del modelo con tamaño, backend, tamaño de entrada e hilos del perfil (si hay uno)."""
+    if profile is None:
+        return dict(model_settings)
+    return dict(
+        model_settings, tamano=profile["tamano"], backend=profile["backend"],
+        imgsz=profile["imgsz"], hilos=profile["hilos"]
+    )
+
+
+def default_threads():
+    """Hilos de torch a probar: todos los núcleos y la mitad (deja CPU a la captura y la interfaz)."""
+    cores = os.cpu_count() or 1
+    return sorted({cores, max(1, cores // 2)}, reverse=True)
+
+
+def sample_frames(video_path=None, count=8, shape=(360, 640, 3)):
+    """
+    Fotogramas para medir, ya al ancho de trabajo del pipeline (640 px). Se toman de video_path si se da
+    (un clip o la cámara); si no, se usa ruido, que basta para medir latencia.
+    """
+    frames = []
+    if video_path:
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            height, width = frame.shape[:2]
+            frames.append(cv2.resize(frame, (shape[1], int(height * shape[1] / width))))
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+    return frames
+
+
+def measure(model, frames, imgsz, threads=None, runs=8, warmup=2):
+    """
+    Latencias (s) de detect() por fotograma, con el mismo preproceso y motor que usa el pipeline.
+    Los hilos de torch vuelven al valor anterior al terminar, así la calibración no deja fijado el último probado.
+    """
+    from camara.inferencia import InferenceEngine
+    import torch
+    previous_threads = torch.get_num_threads()
+    try:
+        if threads:
+            torch.set_num_threads(threads)
+        engine = InferenceEngine(model, imgsz=imgsz, max_batch=1)
+        for index in range(warmup):
+            engine.detect([frames[index % len(frames)]])
+        latencies = []
+        for index in range(runs):
+            started = time.perf_counter()
+            engine.detect([frames[index % len(frames)]])
+            latencies.append(time.perf_counter() - started)
+    finally:
+        torch.set_num_threads(previous_threads)
+    return latencies
+
+
+def calibrate(budget_ms=150.0, sizes=("m", "s", "n"), imgszs=IMGSZ, threads=None, backends=None, int8=False,
+              frames=None, runs=8):
+    """
+    Busca la configuración más precisa que cumple el presupuesto de latencia (p95 por fotograma) en este equipo.
+    Recorre de mayor a menor precisión (tamaño de modelo y luego tamaño de entrada) y en cada nivel mide todos
+    los backends e hilos; el primer nivel con alguna combinación dentro del presupuesto gana con su combinación
+    más rápida, sin medir los niveles inferiores. Si ninguna cumple, queda la más rápida medida.
+    Los hilos solo se varían con torch: ONNX Runtime y OpenVINO fijan los suyos al crear la sesión.
+    """
+    sizes = [size for size in sizes if size in MODEL_SIZES]
+    backends = list(backends or available_backends())
+    threads = list(threads or default_threads())
+    frames = frames or sample_frames()
+    measurements = []
+    winner = None
+    for size in sizes:
+        models = {}
+        for backend in backends:
+            try:
+                models[backend], _ = load_detector(size, backend, int8=int8)
+            except Exception as error:
+                print(f"Calibración: yolov8{size} con {backend} no disponible ({error})")
+        for imgsz in imgszs:
+            level = []
+            for backend, model in models.items():
+                for thread_count in (threads if backend == "torch" else [None]):
+                    try:
+                        latencies = measure(model, frames, imgsz, thread_count, runs=runs)
+                    except Exception as error:
+                        print(f"Calibración: falló yolov8{size} {backend} {imgsz}px ({error})")
+                        continue
+                    result = {
+                        "tamano": size, "backend": backend, "imgsz": imgsz, "hilos": thread_count,
+                        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+                        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+                    }
+                    print(f"Calibración: yolov8{size} {backend} {imgsz}px hilos={thread_count or '-'} "
+                          f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms")
+                    measurements.append(result)
+                    level.append(result)
+            within = [result for result in level if result["p95_ms"] <= budget_ms]
+            if within:
+                winner = min(within, key=lambda result: result["p95_ms"])
+                break
+        if winner is not None:
+            break
+    if winner is None:
+        if not measurements:
+            raise RuntimeError("No se pudo medir ninguna configuración del detector")
+        winner = min(measurements, key=lambda result: result["p95_ms"])
+
+    return dict(
+        winner, presupuesto_ms=budget_ms, dentro_presupuesto=winner["p95_ms"] <= budget_ms,
+        int8=int8, fecha=datetime.now().isoformat(timespec="seconds"), mediciones=measurements
+    )
+
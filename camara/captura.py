@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameBuffer:
+    """
+    Buffer entre la captura y la inferencia.
+    Con maxlen=1 conserva solo el fotograma más reciente; con maxlen>1 es una cola acotada
+    que descarta el más antiguo cuando se llena. Con drop=False la captura espera (útil para videos grabados).
+    """
+    def __init__(self, maxlen=1, drop=True):
+        self.maxlen = max(1, maxlen)
+        self.drop = drop
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped_frames = 0  # Fotogramas descartados sin llegar a la inferencia
+
+    def put(self, frame, timestamp):
+        with self._cond:
+            if not self.drop:
+                self._cond.wait_for(lambda: len(self._frames) < self.maxlen or self.closed)
+                if self.closed:
+                    return
+            elif len(self._frames) >= self.maxlen:
+                self._frames.popleft()
+                self.dropped_frames += 1
+            self._frames.append((frame, timestamp))
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Retorna (frame, timestamp) o None si se agota el tiempo o el buffer fue cerrado.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._frames or self.closed, timeout):
+                return None
+            if not self._frames:
+                return None
+            item = self._frames.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class FrameGrabber(threading.Thread):
+    """
+    Hilo que solo lee fotogramas del stream y los deja en el buffer,
+    así el buffer RTSP no se acumula aunque la inferencia sea más lenta que la cámara.
+    """
+    def __init__(self, video_path, frame_buffer, realtime=None, metrics=None, name=None):
+        super().__init__(daemon=True)
+        self.metrics = metrics
+        self.name = name or str(video_path)
+        self.video_path = video_path
+        self.frame_buffer = frame_buffer
+        # Los videos grabados se reproducen a su velocidad real, como si fueran la cámara
+        self.realtime = not is_live_source(video_path) if realtime is None else realtime
+        self.running = True
+        self.frames_read = 0
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        started = time.monotonic()
+        while self.running and cap.isOpened():
+            read_started = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if self.metrics is not None:
+                self.metrics.observe("decodificacion", self.name, time.perf_counter() - read_started)
+            self.frames_read += 1
+            if self.realtime:
+                delay = started + cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.frame_buffer.put(frame, time.monotonic())
+        cap.release()
+        self.frame_buffer.close()
+
+    def stop(self):
+        self.running = False
+        self.frame_buffer.close()
+
+
+def is_live_source(video_path):
+    """Los streams (rtsp://, http://) se consumen en tiempo real; los archivos no deben perder fotogramas."""
+    return "://" in str(video_path)
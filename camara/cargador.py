@@ -0,0 +1,102 @@
+import threading
+
+from camara.backends import load_detector
+from camara.preproceso import LetterboxBuffers
+
+PENDIENTE = "pendiente"
+CALIBRANDO = "calibrando"
+CARGANDO = "cargando"
+LISTO = "listo"
+ERROR = "error"
+
+
+class ModelLoader:
+    """
+    Carga el modelo en segundo plano (los imports de torch/ultralytics ocurren aquí, no al abrir la app)
+    y hace una inferencia de calentamiento para que la primera detección real no pague ese costo.
+    Con profile_path, el tamaño, backend, tamaño de entrada e hilos salen del perfil calibrado para este equipo;
+    si el equipo no tiene perfil, o el suyo se calibró con otro backend o INT8, antes de cargar se calibra
+    contra budget_ms y se guarda el resultado.
+    """
+    def __init__(self, size="m", backend="auto", int8=False, warmup_shape=(360, 640, 3), imgsz=640, threads=None,
+                 profile_path=None, budget_ms=150.0):
+        self.size = size
+        self.backend_name = backend
+        self.int8 = int8
+        self.warmup_shape = warmup_shape  # Fotograma de trabajo típico (640 px de ancho)
+        self.imgsz = imgsz
+        self.threads = threads
+        self.profile_path = profile_path
+        self.budget_ms = budget_ms
+        self.profile = None  # Perfil calibrado que se aplicó, con sus latencias medidas
+        self.status = PENDIENTE
+        self.model = None
+        self.backend = None
+        self.error = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.status == LISTO
+
+    def start(self):
+        """Inicia la carga si aún no empezó. Se puede llamar varias veces."""
+        with self._lock:
+            if self._thread is None:
+                self.status = CARGANDO
+                self._thread = threading.Thread(target=self._load, daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Bloquea hasta que termine la carga. Retorna True si el modelo quedó listo."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def add_done_callback(self, callback):
+        """callback(loader) se llama desde el hilo de carga al terminar (o de inmediato si ya terminó)."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _apply_profile(self):
+        from camara.calibracion import calibrate, load_profile, profile_matches, save_profile
+        self.profile = load_profile(self.profile_path)
+        if not profile_matches(self.profile, self.int8, self.backend_name):
+            self.status = CALIBRANDO
+            print("Calibrando el detector para este equipo y configuración...")
+            backends = None if self.backend_name == "auto" else [self.backend_name]
+            self.profile = calibrate(self.budget_ms, backends=backends, int8=self.int8)
+            save_profile(self.profile, self.profile_path)
+            self.status = CARGANDO
+        self.size, self.backend_name = self.profile["tamano"], self.profile["backend"]
+        self.imgsz, self.threads = self.profile["imgsz"], self.profile["hilos"]
+
+    def _load(self):
+        try:
+            if self.profile_path is not None:
+                self._apply_profile()
+            import torch
+            if self.threads:
+                torch.set_num_threads(self.threads)
+            model, backend = load_detector(self.size, self.backend_name, int8=self.int8, imgsz=self.imgsz)
+            # Calentamiento: la primera pasada inicializa kernels, memoria y grafos del backend.
+            # Se usa un tensor BCHW del tamaño del lienzo que prepara InferenceEngine, para calentar el mismo camino
+            (height, width), _, _, _ = LetterboxBuffers(self.imgsz).geometry(*self.warmup_shape[:2])
+            model(torch.zeros((1, 3, height, width), dtype=torch.float32), verbose=False)
+            self.model, self.backend = model, backend
+            self.status = LISTO
+        except Exception as error:
+            self.error = error
+            self.status = ERROR
+            print(f"Error cargando el modelo: {error}")
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
@@ -0,0 +1,96 @@
+import numpy as np
+
+ENTRADA = "Entrada"
+SALIDA = "Salida"
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+def points_in_polygon(points, polygon):
+    """
+    Ray casting vectorizado: retorna un arreglo booleano (N,) indicando qué puntos (N, 2) caen dentro del polígono (K, 2).
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    hits = straddles & (x < x_cross)
+    return (hits.sum(axis=1) % 2) == 1
+
+
+class CrossingEngine:
+    """
+    Detecta cruces de cualquier cantidad de segmentos (con cualquier orientación) y zonas poligonales.
+    Por fotograma, todos los desplazamientos de las pistas (centro anterior -> centro actual)
+    se prueban contra todos los segmentos en un único cálculo de intersección en NumPy.
+    """
+    def __init__(self):
+        self.labels = []
+        self.directions = np.empty(0, dtype=np.int8)
+        self.segments = np.empty((0, 4), dtype=np.float32)  # x1, y1, x2, y2 por segmento
+        self.zones = []  # (polígono, etiqueta al entrar, etiqueta al salir)
+
+    def add_line(self, label, p1, p2, direction=0):
+        """
+        Agrega un segmento. direction=0 cuenta en ambos sentidos; 1 o -1 solo cuando el
+        desplazamiento pasa del lado negativo al positivo (o al revés) del vector p1 -> p2.
+        """
+        self.labels.append(label)
+        self.directions = np.append(self.directions, np.int8(direction or 0))
+        self.segments = np.vstack([self.segments, np.array([[*p1, *p2]], dtype=np.float32)])
+
+    def add_zone(self, polygon, on_enter=None, on_exit=None):
+        self.zones.append((np.asarray(polygon, dtype=np.float32).reshape(-1, 2), on_enter, on_exit))
+
+    def clear(self):
+        self.__init__()
+
+    def segment_crossings(self, prev_centers, centers):
+        """
+        Retorna una matriz booleana (N, M): la pista i cruzó el segmento j en este fotograma.
+        """
+        prev_centers = np.asarray(prev_centers, dtype=np.float32).reshape(-1, 2)
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        if not len(prev_centers) or not len(self.segments):
+            return np.zeros((len(prev_centers), len(self.segments)), dtype=bool)
+
+        px, py = prev_centers[:, 0:1], prev_centers[:, 1:2]
+        qx, qy = centers[:, 0:1], centers[:, 1:2]
+        ax, ay, bx, by = (self.segments[:, i][None, :] for i in range(4))
+
+        # Lado de la línea en que están el punto anterior y el actual
+        side_prev = np.sign(_cross(bx - ax, by - ay, px - ax, py - ay))
+        side_curr = np.sign(_cross(bx - ax, by - ay, qx - ax, qy - ay))
+        # Lado del desplazamiento en que están los extremos del segmento
+        side_a = np.sign(_cross(qx - px, qy - py, ax - px, ay - py))
+        side_b = np.sign(_cross(qx - px, qy - py, bx - px, by - py))
+
+        # Un punto que queda justo sobre la línea no se vuelve a contar en el fotograma siguiente
+        crossed = (side_prev != 0) & (side_curr != side_prev) & (side_a * side_b <= 0)
+        wanted = (self.directions[None, :] == 0) | (side_prev == -self.directions[None, :])
+        return crossed & wanted
+
+    def evaluate(self, prev_centers, centers):
+        """
+        Retorna una lista de (índice de la pista, etiqueta) con los cruces de segmentos y zonas del fotograma.
+        """
+        events = []
+        hits = self.segment_crossings(prev_centers, centers)
+        for track, segment in zip(*np.nonzero(hits)):
+            events.append((int(track), self.labels[segment]))
+        if self.zones and len(centers):
+            for polygon, on_enter, on_exit in self.zones:
+                was_inside = points_in_polygon(prev_centers, polygon)
+                is_inside = points_in_polygon(centers, polygon)
+                if on_enter:
+                    events.extend((int(track), on_enter) for track in np.nonzero(~was_inside & is_inside)[0])
+                if on_exit:
+                    events.extend((int(track), on_exit) for track in np.nonzero(was_inside & ~is_inside)[0])
+        return events
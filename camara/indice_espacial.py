@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class RecentCrossingIndex:
+    """
+    Índice espacial por celdas con expiración temporal.
+    Responde "¿hubo un cruce a menos de radius píxeles en los últimos window segundos?"
+    revisando solo las 9 celdas vecinas. Los cruces se guardan en arreglos circulares de tamaño fijo;
+    capacity debe superar los cruces esperados dentro de una ventana.
+    """
+    def __init__(self, radius=20, window=1.0, capacity=256):
+        self.radius = radius
+        self.window = window
+        self.capacity = capacity
+        self.xs = np.zeros(capacity, dtype=np.float32)
+        self.ys = np.zeros(capacity, dtype=np.float32)
+        self.ts = np.full(capacity, -np.inf, dtype=np.float64)
+        self.slot_cells = [None] * capacity  # Celda a la que pertenece cada posición del arreglo
+        self._cells = {}  # (celda_x, celda_y) -> posiciones ocupadas
+        self._head = 0
+
+    def _cell(self, x, y):
+        return int(x // self.radius), int(y // self.radius)
+
+    def insert(self, x, y, timestamp):
+        slot = self._head
+        old_cell = self.slot_cells[slot]
+        if old_cell is not None:
+            slots = self._cells.get(old_cell)
+            if slots is not None:
+                if slot in slots:
+                    slots.remove(slot)
+                if not slots:
+                    del self._cells[old_cell]
+        cell = self._cell(x, y)
+        self.xs[slot] = x
+        self.ys[slot] = y
+        self.ts[slot] = timestamp
+        self.slot_cells[slot] = cell
+        self._cells.setdefault(cell, []).append(slot)
+        self._head = (slot + 1) % self.capacity
+
+    def query(self, x, y, timestamp):
+        """Retorna True si hay un cruce reciente dentro de radius (en x e y) y de window segundos."""
+        cx, cy = self._cell(x, y)
+        oldest = timestamp - self.window
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = (cx + dx, cy + dy)
+                slots = self._cells.get(cell)
+                if not slots:
+                    continue
+                # Descartar de paso las entradas expiradas de la celda
+                live = [slot for slot in slots if self.ts[slot] > oldest]
+                if len(live) != len(slots):
+                    if live:
+                        self._cells[cell] = live
+                    else:
+                        del self._cells[cell]
+                    for slot in slots:
+                        if self.ts[slot] <= oldest:
+                            self.slot_cells[slot] = None
+                for slot in live:
+                    if abs(self.xs[slot] - x) < self.radius and abs(self.ys[slot] - y) < self.radius:
+                        return True
+        return False
+
+    def __len__(self):
+        return sum(len(slots) for slots in self._cells.values())
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from camara.preproceso import LetterboxBuffers
+
+# Clases permitidas: 2(car), 5(bus), 7(truck) - según el listado de detector_clases_yolo.py
+ALLOWED_CLASSES = [2, 5, 7]
+
+
+class EngineStopped(RuntimeError):
+    """El motor de inferencia se detuvo con stop(): los pedidos nuevos fallan de inmediato."""
+
+
+def results_to_array(result):
+    """
+    Convierte un resultado de Ultralytics en un arreglo (N, 6) float32: x1, y1, x2, y2, confianza, clase.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+    xyxy = boxes.xyxy.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()[:, None]
+    cls = boxes.cls.cpu().numpy()[:, None]
+    return np.concatenate([xyxy, conf, cls], axis=1).astype(np.float32)
+
+
+class InferenceEngine:
+    """
+    Motor de inferencia compartido sobre un modelo YOLO.
+    Recibe fotogramas de uno o más productores, los agrupa en micro-lotes
+    (hasta max_batch fotogramas o max_wait segundos) y ejecuta el modelo una sola vez por fotograma.
+    Con preprocess=True el lote se prepara en buffers preasignados (LetterboxBuffers) y el modelo recibe
+    un tensor listo; con False se le pasan los fotogramas y Ultralytics hace su propio preproceso.
+    """
+    def __init__(self, yolo_model, conf=0.6, classes=None, max_batch=4, max_wait=0.01, imgsz=640,
+                 preprocess=True, metrics=None):
+        self.yolo_model = yolo_model
+        self.conf = conf  # Mayor confianza para menos falsos positivos
+        self.classes = list(ALLOWED_CLASSES if classes is None else classes)
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.letterbox = LetterboxBuffers(imgsz, max_batch=self.max_batch) if preprocess else None
+        self.metrics = metrics  # Tiempos de "preproceso" y "modelo" bajo la cámara "motor"
+        self.batches_run = 0
+        self.frames_run = 0
+        self._queue = queue.Queue()
+        self._running = False
+        self._stopped = False  # stop() explícito: se rechazan pedidos hasta un nuevo start()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._stopped = False
+            if self._thread is None or not self._thread.is_alive():
+                self._running = True
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._running = False
+            self._queue.put(None)
+
+    def submit(self, frame):
+        """
+        Encola un fotograma y retorna un Future con el arreglo de detecciones.
+        Con el motor detenido el Future falla de inmediato, en vez de quedar esperando un hilo que ya no existe.
+        """
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(EngineStopped("Motor de inferencia detenido"))
+                return future
+            if self._thread is None or not self._thread.is_alive():
+                self._running = True
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._queue.put((frame, future))
+        return future
+
+    def infer(self, frame, timeout=None):
+        """Atajo bloqueante para un productor: retorna el arreglo (N, 6) de detecciones."""
+        return self.submit(frame).result(timeout=timeout)
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _observe(self, stage, started):
+        if self.metrics is not None:
+            self.metrics.observe(stage, "motor", time.perf_counter() - started)
+
+    def _predict(self, source):
+        return self.yolo_model(
+            source,
+            conf=self.conf,
+            classes=self.classes,  # Filtramos solo las clases deseadas en la misma pasada
+            verbose=False  # Desactivar logs para mejor rendimiento
+        )
+
+    def detect(self, frames):
+        """
+        Ejecuta el modelo sobre el lote en el hilo que llama y retorna un arreglo (N, 6) por fotograma,
+        en sus coordenadas. Lo usan el hilo del motor y los procesos de ProcessInferenceEngine.
+        """
+        if self.letterbox is None:
+            started = time.perf_counter()
+            results = self._predict(frames)
+            self._observe("modelo", started)
+            return [results_to_array(result) for result in results]
+
+        detections = [None] * len(frames)
+        started = time.perf_counter()
+        prepared = self.letterbox.prepare(frames)
+        self._observe("preproceso", started)
+        for tensor, indices, geometries in prepared:
+            started = time.perf_counter()
+            results = self._predict(tensor)
+            self._observe("modelo", started)
+            for index, geometry, result in zip(indices, geometries, results):
+                detections[index] = self.letterbox.undo(results_to_array(result), geometry, frames[index].shape)
+        return detections
+
+    def _run(self):
+        while self._running:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+            frames = [frame for frame, _ in batch]
+            try:
+                detections = self.detect(frames)
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            self.batches_run += 1
+            self.frames_run += len(batch)
+            for (_, future), result in zip(batch, detections):
+                future.set_result(result)
+
+        # Cancelar lo que haya quedado pendiente al detener el motor
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].cancel()
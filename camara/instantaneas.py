@@ -0,0 +1,103 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+_CALENTAR = "calentar"  # Pedido de abrir el stream sin guardar nada
+
+
+def map_box(box, from_size, to_size):
+    """
+    Lleva una caja x1, y1, x2, y2 de una resolución (ancho, alto) a otra. Ambos streams de la cámara
+    cubren el mismo campo visual, así que cada eje se escala por separado aunque la proporción difiera
+    (por ejemplo substream 704x576 y principal 1920x1080).
+    """
+    scale = np.array([to_size[0] / from_size[0], to_size[1] / from_size[1]] * 2, dtype=np.float32)
+    return np.asarray(box, dtype=np.float32)[:4] * scale
+
+
+class MainStreamSnapshotter(threading.Thread):
+    """
+    Capturas en alta resolución de los cruces desde el stream principal de la cámara.
+    La detección corre sobre el substream; el stream principal se abre con warm() apenas hay movimiento
+    o pistas cerca de las líneas (abrir RTSP y esperar el primer keyframe toma 1-3 s, más de lo que tarda el
+    vehículo en cruzar), se mantiene abierto mientras siga la actividad o lleguen pedidos y se cierra
+    keep_open segundos después, así su decodificación no consume CPU el resto del tiempo.
+    """
+    def __init__(self, url, output_dir="capturas", name="Cámara", keep_open=5.0, padding=0.15):
+        super().__init__(daemon=True)
+        self.url = url
+        self.output_dir = output_dir
+        self.camera_name = name
+        self.keep_open = keep_open
+        self.padding = padding  # Margen alrededor de la caja, como fracción de su tamaño
+        self.requests = queue.Queue()
+        self.running = True
+        self.saved = 0
+        self._last_warm = 0.0
+
+    def request(self, box, frame_size, label):
+        """Pide una captura de la caja (coordenadas de un fotograma de tamaño frame_size). No bloquea."""
+        self.requests.put((np.array(box[:4], dtype=np.float32), frame_size, label, datetime.now()))
+
+    def warm(self):
+        """Abre (o mantiene abierto) el stream principal porque puede venir un cruce. No bloquea."""
+        now = time.monotonic()
+        if now - self._last_warm < self.keep_open / 4:
+            return  # Ya hay un aviso reciente: no llenar la cola en cada fotograma
+        self._last_warm = now
+        self.requests.put(_CALENTAR)
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+
+    def run(self):
+        cap = None
+        last_request = 0.0
+        while self.running:
+            if cap is None:
+                item = self.requests.get()
+            else:
+                try:
+                    item = self.requests.get_nowait()
+                except queue.Empty:
+                    # Mientras está abierto se sigue leyendo (al ritmo de la cámara) para no servir
+                    # fotogramas atrasados del buffer RTSP; pasado keep_open sin pedidos se cierra
+                    if time.monotonic() - last_request > self.keep_open or not cap.grab():
+                        cap.release()
+                        cap = None
+                    continue
+            if item is None:
+                break
+            if cap is None:
+                cap = cv2.VideoCapture(self.url)
+                if not cap.isOpened():
+                    print(f"[{self.camera_name}] No se pudo abrir el stream principal")
+                    cap = None
+                    continue
+            last_request = time.monotonic()
+            if item is _CALENTAR:
+                continue
+            ret, frame = cap.read()
+            if ret:
+                self.save(frame, *item)
+        if cap is not None:
+            cap.release()
+
+    def save(self, frame, box, frame_size, label, when):
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = map_box(box, frame_size, (width, height))
+        pad_x, pad_y = (x2 - x1) * self.padding, (y2 - y1) * self.padding
+        x1, y1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+        x2, y2 = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+        if x2 <= x1 or y2 <= y1:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        file_name = f"{self.camera_name}_{when:%Y%m%d_%H%M%S_%f}_{label}.jpg".replace(" ", "_")
+        cv2.imwrite(os.path.join(self.output_dir, file_name), frame[y1:y2, x1:x2])
+        self.saved += 1
@@ -0,0 +1,237 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Límites de los buckets en segundos (0.5 ms a 5 s)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RollingHistogram:
+    """
+    Histograma de tiempos con buckets fijos. Guarda el acumulado (para Prometheus) y una ventana
+    móvil de window segundos dividida en slots (para percentiles recientes en el log).
+    """
+    def __init__(self, window=60.0, slots=6):
+        self.slot_seconds = window / slots
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._slots = [[0] * (len(BUCKETS) + 1) for _ in range(slots)]
+        self._slot_started = [0.0] * slots
+
+    def observe(self, seconds, now=None):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        self.count += 1
+        self.sum += seconds
+        self.buckets[index] += 1
+        now = time.monotonic() if now is None else now
+        slot = int(now / self.slot_seconds) % len(self._slots)
+        if now - self._slot_started[slot] >= self.slot_seconds:
+            self._slots[slot] = [0] * len(self.buckets)
+            self._slot_started[slot] = now - now % self.slot_seconds
+        self._slots[slot][index] += 1
+
+    def recent(self, now=None):
+        """Conteos por bucket de la ventana móvil."""
+        now = time.monotonic() if now is None else now
+        window = self.slot_seconds * len(self._slots)
+        totals = [0] * len(self.buckets)
+        for started, counts in zip(self._slot_started, self._slots):
+            if now - started < window:
+                totals = [a + b for a, b in zip(totals, counts)]
+        return totals
+
+    def percentile(self, q, now=None):
+        """Percentil aproximado (límite superior del bucket) de la ventana móvil, en segundos."""
+        counts = self.recent(now)
+        total = sum(counts)
+        if not total:
+            return 0.0
+        target = q / 100.0 * total
+        running = 0
+        for limit, count in zip(BUCKETS + (float("inf"),), counts):
+            running += count
+            if running >= target:
+                return limit
+        return BUCKETS[-1]
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Registro de métricas del hot path: histogramas por etapa y cámara, contadores y gauges.
+    Los contadores y gauges que ya existen en otros objetos se leen con collectors al exportar, sin costo por fotograma.
+    """
+    def __init__(self):
+        self.histograms = {}  # (etapa, cámara) -> RollingHistogram
+        self.counters = {}    # (nombre, cámara) -> valor
+        self.collectors = []  # funciones que retornan [(nombre, cámara, valor)] de contadores
+        self.gauge_collectors = []  # ídem, con valores instantáneos (edad del fotograma, etc.)
+        self._lock = threading.Lock()
+
+    def histogram(self, stage, camera):
+        key = (stage, camera)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, RollingHistogram())
+        return histogram
+
+    def timer(self, stage, camera):
+        return _Timer(self.histogram(stage, camera))
+
+    def observe(self, stage, camera, seconds):
+        self.histogram(stage, camera).observe(seconds)
+
+    def inc(self, name, camera, value=1):
+        key = (name, camera)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def register_collector(self, collector, gauge=False):
+        """collector() retorna [(nombre, cámara, valor)]; con gauge=True los valores se exportan como gauges."""
+        with self._lock:
+            (self.gauge_collectors if gauge else self.collectors).append(collector)
+
+    def unregister_collector(self, collector):
+        """Quita el collector de un objeto que ya terminó (por ejemplo una cámara detenida)."""
+        with self._lock:
+            for collectors in (self.collectors, self.gauge_collectors):
+                if collector in collectors:
+                    collectors.remove(collector)
+
+    def _histogram_items(self):
+        # Copia bajo el lock: las cámaras agregan histogramas nuevos mientras se exporta
+        with self._lock:
+            return sorted(self.histograms.items())
+
+    def snapshot_counters(self):
+        with self._lock:
+            values = dict(self.counters)
+            collectors = list(self.collectors)
+        for collector in collectors:
+            for name, camera, value in collector():
+                values[(name, camera)] = value
+        return values
+
+    def snapshot_gauges(self):
+        with self._lock:
+            collectors = list(self.gauge_collectors)
+        return {(name, camera): value for collector in collectors for name, camera, value in collector()}
+
+    def render_prometheus(self):
+        """Exporta las métricas en formato de texto de Prometheus."""
+        lines = ["# TYPE estacionamiento_etapa_segundos histogram"]
+        for (stage, camera), histogram in self._histogram_items():
+            labels = f'etapa="{stage}",camara="{camera}"'
+            running = 0
+            for limit, count in zip(BUCKETS, histogram.buckets):
+                running += count
+                lines.append(f'estacionamiento_etapa_segundos_bucket{{{labels},le="{limit}"}} {running}')
+            lines.append(f'estacionamiento_etapa_segundos_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"estacionamiento_etapa_segundos_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"estacionamiento_etapa_segundos_count{{{labels}}} {histogram.count}")
+        counters = self.snapshot_counters()
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE estacionamiento_{name}_total counter")
+            for (counter, camera), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'estacionamiento_{name}_total{{camara="{camera}"}} {value}')
+        gauges = self.snapshot_gauges()
+        for name in sorted({name for name, _ in gauges}):
+            lines.append(f"# TYPE estacionamiento_{name} gauge")
+            for (gauge, camera), value in sorted(gauges.items()):
+                if gauge == name:
+                    lines.append(f'estacionamiento_{name}{{camara="{camera}"}} {value:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """Línea corta para el log periódico: p50/p99 recientes por etapa en ms, contadores y gauges."""
+        parts = []
+        for (stage, camera), histogram in self._histogram_items():
+            parts.append(f"{camera}/{stage} p50={histogram.percentile(50) * 1000:.1f}ms p99={histogram.percentile(99) * 1000:.1f}ms")
+        for (name, camera), value in sorted(self.snapshot_counters().items()):
+            parts.append(f"{camera}/{name}={value}")
+        for (name, camera), value in sorted(self.snapshot_gauges().items()):
+            parts.append(f"{camera}/{name}={value:.3f}")
+        return " | ".join(parts)
+
+
+METRICS = Metrics()  # Registro compartido por todas las cámaras del proceso
+
+
+def start_metrics_server(metrics=METRICS, host="127.0.0.1", port=9108):
+    """Sirve /metrics en formato Prometheus desde un hilo en segundo plano. Retorna el servidor."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Sin log por cada consulta
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Métricas en http://{host}:{port}/metrics")
+    return server
+
+
+def start_periodic_log(interval, metrics=METRICS):
+    """Imprime un resumen de las métricas cada interval segundos."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            print(f"[métricas] {metrics.summary_line()}")
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def setup_metrics(settings, metrics=METRICS):
+    """
+    Activa las métricas según la configuración ("habilitado", "puerto", "log_segundos").
+    Retorna el registro a pasar a los pipelines, o None si están deshabilitadas.
+    """
+    if not settings.get("habilitado", True):
+        return None
+    if settings.get("puerto"):
+        try:
+            start_metrics_server(metrics, port=settings["puerto"])
+        except OSError as error:
+            # Otra instancia ya usa el puerto: se sigue midiendo, solo sin endpoint
+            print(f"No se pudo abrir el endpoint de métricas en el puerto {settings['puerto']}: {error}")
+    if settings.get("log_segundos"):
+        start_periodic_log(settings["log_segundos"], metrics)
+    return metrics
@@ -0,0 +1,53 @@
+import cv2
+
+
+class MotionGate:
+    """
+    Filtro de movimiento barato antes de YOLO.
+    Compara una versión reducida en escala de grises de la región de las líneas con un fondo
+    promediado; si cambia más de min_area (fracción de píxeles) despierta al detector,
+    que sigue activo hold_time segundos después del último movimiento.
+    """
+    def __init__(self, threshold=25, min_area=0.002, hold_time=2.0, width=160, alpha=0.05):
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold_time = hold_time
+        self.width = width
+        self.alpha = alpha  # Velocidad con que el fondo absorbe cambios lentos (luz, sombras)
+        self.background = None
+        self.last_motion = None
+        self.frames_seen = 0
+        self.frames_gated = 0  # Fotogramas en que se omitió YOLO
+
+    @property
+    def gated_percent(self):
+        return 100.0 * self.frames_gated / self.frames_seen if self.frames_seen else 0.0
+
+    def _prepare(self, frame, roi):
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            frame = frame[y1:y2, x1:x2]
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def update(self, frame, timestamp, roi=None):
+        """Retorna True si hay que ejecutar el detector en este fotograma."""
+        self.frames_seen += 1
+        gray = self._prepare(frame, roi)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype("float32")
+            self.last_motion = timestamp
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+        if changed >= self.min_area * gray.size:
+            self.last_motion = timestamp
+        if timestamp - self.last_motion <= self.hold_time:
+            return True
+        self.frames_gated += 1
+        return False
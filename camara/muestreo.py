@@ -0,0 +1,68 @@
+class AdaptiveSampler:
+    """
+    Decide cuándo procesar un fotograma según el tiempo y no según un salto fijo de fotogramas.
+    Apunta a target_hz detecciones por segundo, sube a active_hz mientras haya pistas cerca
+    de las líneas, baja a idle_hz cuando la entrada está vacía y, si la inferencia tarda más
+    que el intervalo disponible, se retrasa automáticamente para no acumular atraso.
+    """
+    def __init__(self, target_hz=5.0, active_hz=None, idle_hz=None, backoff=1.2, smoothing=0.2):
+        self.set_rates(target_hz, active_hz, idle_hz)
+        self.backoff = backoff  # Margen sobre la latencia medida
+        self.smoothing = smoothing
+        self.latency = 0.0  # Latencia de inferencia suavizada (EWMA), en segundos
+        self.active = False
+        self.idle = False
+        self.next_time = None
+        self.samples = 0
+        self.skipped = 0
+
+    def set_rates(self, target_hz, active_hz=None, idle_hz=None):
+        """Cambia las frecuencias objetivo; rige desde el próximo muestreo."""
+        self.target_hz = target_hz
+        self.active_hz = active_hz or target_hz * 2
+        self.idle_hz = idle_hz or max(target_hz / 4, 0.5)
+
+    @property
+    def interval(self):
+        """Segundos entre detecciones según la actividad y la latencia medida."""
+        if self.active:
+            hz = self.active_hz
+        elif self.idle:
+            hz = self.idle_hz
+        else:
+            hz = self.target_hz
+        return max(1.0 / hz, self.latency * self.backoff)
+
+    @property
+    def effective_hz(self):
+        return 1.0 / self.interval
+
+    def due(self, timestamp):
+        """Retorna True si el fotograma capturado en timestamp debe procesarse."""
+        if self.next_time is None or timestamp >= self.next_time:
+            self.samples += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def wake(self):
+        """
+        Hay movimiento: si el muestreo estaba en idle_hz, el próximo fotograma se procesa de inmediato
+        y vuelve a regir target_hz hasta el próximo record().
+        """
+        if self.idle:
+            self.idle = False
+            self.next_time = None
+
+    def record(self, timestamp, latency, active=False, idle=False):
+        """
+        Registra el resultado de una detección: latencia de inferencia, si hay pistas activas
+        cerca de las líneas y si la entrada está vacía. Programa el próximo muestreo.
+        """
+        if latency > 0:
+            self.latency = latency if not self.latency else (
+                self.smoothing * latency + (1 - self.smoothing) * self.latency
+            )
+        self.active = active
+        self.idle = idle and not active
+        self.next_time = timestamp + self.interval
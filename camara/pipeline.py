@@ -0,0 +1,370 @@
+import time
+from concurrent.futures import CancelledError
+
+import cv2
+import numpy as np
+
+from camara.inferencia import EngineStopped
+from camara.captura import FrameBuffer, FrameGrabber, is_live_source
+from camara.seguimiento import VehicleTracker
+from camara.indice_espacial import RecentCrossingIndex
+from camara.cruces import CrossingEngine, ENTRADA, SALIDA
+from camara.roi import roi_from_points, crop_roi, boxes_from_roi
+from camara.movimiento import MotionGate
+from camara.muestreo import AdaptiveSampler
+from camara.metricas import NULL_TIMER
+from camara.instantaneas import MainStreamSnapshotter
+
+
+class StreamPipeline:
+    """
+    Captura, detección, seguimiento y conteo de una cámara, sin Qt ni ventanas.
+    Los cruces se informan con los callbacks on_entry/on_exit; on_frame(frame, detections, statuses, roi)
+    solo se llama si alguien va a mostrar el video, así el modo sin pantalla no dibuja nada.
+    """
+    def __init__(self, video_path, engine, left_line, right_line, detection_hz=5.0, buffer_size=1, name="Cámara",
+                 lines=None, zones=None, roi=False, roi_padding=80, motion_gate=True, active_hz=None, idle_hz=None,
+                 on_entry=None, on_exit=None, on_frame=None, metrics=None, main_url=None, snapshot_dir="capturas",
+                 expected_latency=None, reference_size=None):
+        self.name = name
+        self.video_path = video_path
+        self.engine = engine  # InferenceEngine compartido (modelo YOLO + micro-lotes)
+        self.left_line = left_line
+        self.right_line = right_line
+        self.on_entry = on_entry
+        self.on_exit = on_exit
+        self.on_frame = on_frame
+        # Muestreo por tiempo: detecciones por segundo según actividad y latencia, no cada N fotogramas
+        self.sampler = AdaptiveSampler(detection_hz, active_hz=active_hz, idle_hz=idle_hz)
+        if expected_latency:
+            # Latencia medida al calibrar el equipo: el muestreo respeta el ritmo posible desde el primer fotograma
+            self.sampler.latency = expected_latency
+        self.frame_counter = 0  # Contador de fotogramas recibidos
+        self.running = True
+        self.time_threshold = 1.0  # Tiempo mínimo entre detecciones para evitar duplicados
+        # Cruces recientes (20 px, time_threshold s) para no contar dos veces el mismo vehículo
+        self.recent_crossings = RecentCrossingIndex(radius=20, window=self.time_threshold)
+        # Motor de cruces: línea derecha = entrada, línea izquierda = salida, más líneas/zonas opcionales.
+        # Las coordenadas se dibujan sobre un fotograma de reference_size (ancho, alto) y se escalan al tamaño
+        # real del fotograma de trabajo, que depende de la proporción del stream (16:9, 4:3, D1...)
+        self.reference_size = reference_size
+        self.geometry = (left_line, right_line, lines, zones)
+        self.working_size = None  # (ancho, alto) para el que está escalado el motor de cruces
+        self.crossing_engine = self.build_crossing_engine(left_line, right_line, lines, zones)
+        self.counted_crossings = {}  # ID de pista -> tipos de cruce ya contados
+        # Modo ROI: detectar solo en un recorte alrededor de las líneas, a resolución completa
+        self.roi = roi
+        self.roi_padding = roi_padding
+        # Filtro de movimiento: con la entrada vacía no se ejecuta YOLO
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.tracker = VehicleTracker()  # Pistas con ID estable, envejecimiento y tope de memoria
+        # Captura desacoplada: buffer_size=1 conserva solo el último fotograma, >1 es una cola que descarta el más antiguo
+        self.frame_buffer = FrameBuffer(maxlen=buffer_size, drop=is_live_source(video_path))
+        self.grabber = None
+        # Doble stream: video_path es el substream de detección; si hay main_url, cada cruce se guarda
+        # recortado desde el stream principal, que solo se abre mientras hay actividad cerca de las líneas
+        self.snapshotter = MainStreamSnapshotter(main_url, snapshot_dir, name) if main_url else None
+        self.frame_age = 0.0  # Segundos entre la captura del fotograma y su procesamiento
+        # Para la vista en vivo: último fotograma capturado y último resultado de detección.
+        # La vista los lee a su propio ritmo con render(); la cámara solo guarda referencias
+        self.latest_frame = None
+        self.last_result = None  # (detections, statuses, roi)
+        self.entries = 0  # Entradas contadas por esta cámara
+        self.exits = 0    # Salidas contadas por esta cámara
+        self.frames_inferred = 0
+        self.frames_gated = 0  # Fotogramas muestreados en que el filtro de movimiento evitó YOLO
+        self.failed_detections = 0  # Fotogramas cuya detección falló o venció
+        self.detections_total = 0
+        # Métricas opcionales: tiempos por etapa (histogramas) y contadores leídos al exportar
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.register_collector(self._collect_counters)
+            metrics.register_collector(self._collect_gauges, gauge=True)
+
+    @staticmethod
+    def build_crossing_engine(left_line, right_line, lines=None, zones=None, scale=(1.0, 1.0)):
+        """Arma el motor de cruces con las coordenadas multiplicadas por scale (x, y)."""
+        def scaled(points):
+            return [(x * scale[0], y * scale[1]) for x, y in points]
+
+        crossing_engine = CrossingEngine()
+        crossing_engine.add_line(ENTRADA, *scaled(right_line))
+        crossing_engine.add_line(SALIDA, *scaled(left_line))
+        for line in lines or []:
+            crossing_engine.add_line(line["tipo"], *scaled(line["puntos"]), direction=line.get("direccion", 0))
+        for zone in zones or []:
+            crossing_engine.add_zone(scaled(zone["puntos"]), zone.get("al_entrar"), zone.get("al_salir"))
+        return crossing_engine
+
+    def geometry_scale(self, frame_size):
+        """Escala (x, y) de reference_size al fotograma de trabajo; sin referencia las coordenadas ya son de píxel."""
+        if not self.reference_size or frame_size is None:
+            return (1.0, 1.0)
+        return (frame_size[0] / self.reference_size[0], frame_size[1] / self.reference_size[1])
+
+    def fit_geometry(self, frame_size):
+        """Reescala líneas y zonas si el fotograma de trabajo (ancho, alto) cambió de tamaño."""
+        if frame_size == self.working_size:
+            return
+        self.working_size = frame_size
+        self.crossing_engine = self.build_crossing_engine(*self.geometry, scale=self.geometry_scale(frame_size))
+
+    def reconfigure(self, camera):
+        """
+        Aplica en caliente la configuración de la cámara (diccionario de load_cameras): líneas, zonas, ROI,
+        filtro de movimiento y frecuencias de detección. La captura, las pistas y el modelo no se reinician;
+        el motor de cruces nuevo se reemplaza de una vez, así el hilo de la cámara nunca ve uno a medio armar.
+        """
+        self.left_line = camera["left_line"]
+        self.right_line = camera["right_line"]
+        self.reference_size = camera["resolucion_referencia"]
+        self.geometry = (camera["left_line"], camera["right_line"], camera["lineas"], camera["zonas"])
+        self.crossing_engine = self.build_crossing_engine(*self.geometry, scale=self.geometry_scale(self.working_size))
+        self.roi = camera["roi"]
+        self.roi_padding = camera["roi_padding"]
+        if camera["filtro_movimiento"] and self.motion_gate is None:
+            self.motion_gate = MotionGate()
+        elif not camera["filtro_movimiento"]:
+            self.motion_gate = None
+        self.sampler.set_rates(camera["deteccion_hz"], camera["deteccion_hz_activa"], camera["deteccion_hz_inactiva"])
+        if camera["url"] != self.video_path:
+            print(f"[{self.name}] El cambio de URL se aplica al reiniciar la cámara")
+
+    def _collect_counters(self):
+        return [
+            ("fotogramas_leidos", self.name, self.grabber.frames_read if self.grabber else 0),
+            ("fotogramas_muestreados", self.name, self.sampler.samples),
+            ("fotogramas_filtrados", self.name, self.frames_gated),
+            ("fotogramas_inferidos", self.name, self.frames_inferred),
+            ("fotogramas_descartados", self.name, self.dropped_frames),
+            ("detecciones", self.name, self.detections_total),
+            ("cruces", self.name, self.entries + self.exits),
+        ]
+
+    def _collect_gauges(self):
+        return [("edad_fotograma_segundos", self.name, self.frame_age)]
+
+    def timer(self, stage):
+        """Cronómetro de una etapa; sin métricas no mide nada."""
+        return self.metrics.timer(stage, self.name) if self.metrics is not None else NULL_TIMER
+
+    @property
+    def gated_percent(self):
+        """Porcentaje de fotogramas muestreados en que el filtro de movimiento evitó ejecutar YOLO."""
+        return 100.0 * self.frames_gated / self.sampler.samples if self.sampler.samples else 0.0
+
+    @property
+    def dropped_frames(self):
+        """
+        Fotogramas descartados: los que el buffer reemplazó porque la inferencia no alcanzó a procesarlos
+        y los que se quedaron sin detección por un error o un tiempo límite del motor.
+        """
+        return self.frame_buffer.dropped_frames + self.failed_detections
+
+    def resize_frame(self, frame, width=640):
+        """Redimensiona el fotograma a una resolución específica."""
+        height = int(frame.shape[0] * (width / frame.shape[1]))
+        return cv2.resize(frame, (width, height))
+
+    def crossing_points(self):
+        """Todos los puntos de las líneas y zonas configuradas, en coordenadas del fotograma redimensionado."""
+        points = [self.crossing_engine.segments.reshape(-1, 2)]
+        points.extend(polygon for polygon, _, _ in self.crossing_engine.zones)
+        return np.concatenate(points)
+
+    def tracks_near(self, roi):
+        """True si alguna pista viva está dentro de la región de las líneas."""
+        x1, y1, x2, y2 = roi
+        centers = self.tracker.centers
+        inside = (centers[:, 0] >= x1) & (centers[:, 0] <= x2) & (centers[:, 1] >= y1) & (centers[:, 1] <= y2)
+        return bool(inside.any())
+
+    def detect(self, frame, frame_resized, roi):
+        """
+        Ejecuta la detección sobre el fotograma completo o, en modo ROI, solo sobre el recorte
+        de la imagen original alrededor de las líneas. Las cajas quedan en coordenadas de frame_resized.
+        Si el motor se detuvo (pedido cancelado o rechazado), el fotograma queda sin detecciones.
+        """
+        try:
+            if not self.roi:
+                return self.engine.infer(frame_resized)
+            scale = frame.shape[1] / frame_resized.shape[1]
+            detections = self.engine.infer(crop_roi(frame, roi, scale))
+        except (CancelledError, EngineStopped):
+            return np.empty((0, 6), dtype=np.float32)
+        return boxes_from_roi(detections, roi, scale)
+
+    def check_line_crossing(self, vehicle_ids, prev_centers, centers, current_time):
+        """
+        Verifica los cruces de todas las pistas del fotograma contra todas las líneas y zonas.
+        Retorna una lista alineada con vehicle_ids con "Entrada", "Salida" o None.
+        """
+        statuses = [None] * len(vehicle_ids)
+        for index, crossing in self.crossing_engine.evaluate(prev_centers, centers):
+            vehicle_id = vehicle_ids[index]
+            counted = self.counted_crossings.setdefault(vehicle_id, set())
+            if crossing in counted:
+                continue
+            center_x, center_y = centers[index]
+            # Verificar si el vehículo no fue detectado recientemente
+            if self.recent_crossings.query(center_x, center_y, current_time):
+                continue
+            counted.add(crossing)
+            self.recent_crossings.insert(center_x, center_y, current_time)
+            if crossing == ENTRADA:
+                self.entries += 1
+                print(f"[{self.name}] Vehículo detectado entrando")  # Debug
+                if self.on_entry:
+                    self.on_entry()
+            elif crossing == SALIDA:
+                self.exits += 1
+                print(f"[{self.name}] Vehículo detectado saliendo")  # Debug
+                if self.on_exit:
+                    self.on_exit()
+            statuses[index] = crossing
+        return statuses
+
+    def prepare_frame(self, frame):
+        """Fotograma de trabajo redimensionado, con la geometría ajustada a su tamaño, y la ROI de las líneas."""
+        with self.timer("redimension"):
+            frame_resized = self.resize_frame(frame)
+        frame_size = (frame_resized.shape[1], frame_resized.shape[0])
+        self.fit_geometry(frame_size)
+        return frame_resized, roi_from_points(self.crossing_points(), frame_size, self.roi_padding)
+
+    def process_frame(self, frame, timestamp):
+        """
+        Procesa un fotograma capturado en timestamp (segundos, reloj monótono o tiempo del video).
+        Retorna (frame_resized, detections, statuses, roi) o None si el muestreador lo omitió.
+        El filtro de movimiento ve todos los fotogramas y el muestreador solo limita las pasadas de YOLO:
+        un vehículo que llega con la entrada inactiva se detecta en el acto, no en el próximo muestreo a idle_hz.
+        """
+        self.frame_counter += 1
+        motion_gate = self.motion_gate  # Puede cambiar con reconfigure() desde otro hilo
+        frame_resized = roi = None
+        idle = False
+        if motion_gate is not None:
+            frame_resized, roi = self.prepare_frame(frame)
+            with self.timer("movimiento"):
+                idle = not motion_gate.update(frame_resized, timestamp, roi)
+            if not idle:
+                self.sampler.wake()
+        if not self.sampler.due(timestamp):
+            return None
+        if frame_resized is None:
+            frame_resized, roi = self.prepare_frame(frame)
+        latency = 0.0
+        if idle:
+            # Sin actividad cerca de las líneas: las pistas envejecen sin detecciones nuevas
+            self.frames_gated += 1
+            detections = np.empty((0, 6), dtype=np.float32)
+        else:
+            # Una sola pasada por fotograma, ya filtrada por clases en el motor de inferencia
+            started = time.monotonic()
+            try:
+                with self.timer("inferencia"):
+                    detections = self.detect(frame, frame_resized, roi)
+            except Exception as error:
+                # La detección falló o no respondió a tiempo: el fotograma se descarta y la cámara sigue contando
+                print(f"[{self.name}] Fotograma descartado, falló la detección: {error!r}")
+                self.failed_detections += 1
+                detections = np.empty((0, 6), dtype=np.float32)
+            else:
+                self.frames_inferred += 1
+                self.detections_total += len(detections)
+            latency = time.monotonic() - started
+
+        # Asociar las detecciones a pistas estables
+        with self.timer("seguimiento"):
+            vehicle_ids, prev_centers, centers = self.tracker.update(detections[:, :4], timestamp)
+            live_ids = self.tracker.live_ids()
+            self.counted_crossings = {
+                vehicle_id: counted for vehicle_id, counted in self.counted_crossings.items() if vehicle_id in live_ids
+            }
+
+        # Verificar cruces de todas las pistas en una sola pasada
+        with self.timer("cruces"):
+            statuses = self.check_line_crossing(vehicle_ids.tolist(), prev_centers, centers, timestamp)
+        active = self.tracks_near(roi)
+        if self.snapshotter is not None:
+            if active or (motion_gate is not None and not idle):
+                # Hay algo cerca de las líneas: el stream principal ya queda abierto para el posible cruce
+                self.snapshotter.warm()
+            frame_size = (frame_resized.shape[1], frame_resized.shape[0])
+            for index, crossing in enumerate(statuses):
+                if crossing:
+                    self.snapshotter.request(detections[index], frame_size, crossing)
+        self.sampler.record(timestamp, latency, active=active, idle=idle)
+        self.last_result = (detections, statuses, roi)
+        return frame_resized, detections, statuses, roi
+
+    def draw(self, frame_resized, detections, statuses, roi=None):
+        """Dibuja líneas, zonas, la ROI, las cajas y las etiquetas "Entrada"/"Salida" sobre el fotograma."""
+        if self.roi and roi is not None:
+            cv2.rectangle(frame_resized, roi[:2], roi[2:], (0, 255, 255), 1)
+
+        # Dibujar información en el frame
+        for box, crossing_status in zip(detections, statuses):
+            cv2.rectangle(frame_resized, (int(box[0]), int(box[1])), (int(box[2]), int(box[3])), (0, 200, 0), 1)
+            if crossing_status:
+                x1, y1 = int(box[0]), int(box[1])
+                cv2.putText(frame_resized, crossing_status,
+                          (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                          0.5, (0, 255, 0), 2)
+
+        # Dibujar líneas y zonas
+        for label, segment in zip(self.crossing_engine.labels, self.crossing_engine.segments.astype(int)):
+            color = (255, 0, 0) if label == ENTRADA else (0, 0, 255)
+            cv2.line(frame_resized, tuple(map(int, segment[:2])), tuple(map(int, segment[2:])), color, 2)
+        for polygon, _, _ in self.crossing_engine.zones:
+            cv2.polylines(frame_resized, [polygon.astype(np.int32)], True, (0, 255, 255), 2)
+        return frame_resized
+
+    def render(self):
+        """
+        Fotograma más reciente redimensionado y con las anotaciones de la última detección, o None si aún no hay.
+        Lo llama la vista en vivo desde su propio hilo y ritmo; no modifica el fotograma capturado.
+        """
+        frame = self.latest_frame
+        if frame is None:
+            return None
+        frame_resized = self.resize_frame(frame)
+        if self.last_result is not None:
+            self.draw(frame_resized, *self.last_result)
+        else:
+            self.draw(frame_resized, (), ())
+        return frame_resized
+
+    def run(self):
+        """Bucle de la cámara: toma el fotograma más reciente del buffer y lo procesa hasta stop()."""
+        self.grabber = FrameGrabber(self.video_path, self.frame_buffer, metrics=self.metrics, name=self.name)
+        self.grabber.start()
+        if self.snapshotter is not None:
+            self.snapshotter.start()
+
+        while self.running:
+            item = self.frame_buffer.get(timeout=1.0)
+            if item is None:
+                if self.frame_buffer.closed:
+                    break
+                continue
+            frame, captured_at = item
+            self.frame_age = time.monotonic() - captured_at
+            self.latest_frame = frame
+
+            result = self.process_frame(frame, captured_at)
+            if result is not None and self.on_frame:
+                with self.timer("render"):
+                    self.on_frame(*result)
+
+        self.grabber.stop()
+        if self.snapshotter is not None:
+            self.snapshotter.stop()
+
+    def stop(self):
+        self.running = False
+        self.frame_buffer.close()
+        if self.metrics is not None:
+            # Al reiniciar la cámara se crea otro pipeline: este deja de reportar sus contadores
+            self.metrics.unregister_collector(self._collect_counters)
+            self.metrics.unregister_collector(self._collect_gauges)
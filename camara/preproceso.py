@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+
+class LetterboxBuffers:
+    """
+    Preproceso único hacia el detector. Cada fotograma se redimensiona con letterbox directo a un buffer
+    uint8 preasignado (un lienzo por forma de entrada, reutilizado en cada lote), se pasa a RGB en el mismo
+    lugar y se copia al tensor float BCHW también preasignado. Ultralytics recibe ese tensor tal cual y no
+    vuelve a hacer letterbox ni normalizar; undo() devuelve las cajas a coordenadas del fotograma de entrada.
+    """
+    def __init__(self, imgsz=640, stride=32, max_batch=4, pad_value=114):
+        self.imgsz = imgsz
+        self.stride = stride
+        self.max_batch = max(1, max_batch)
+        self.pad_value = pad_value
+        self._buffers = {}  # (alto, ancho) del lienzo -> (lienzo uint8 BHWC, vista torch del lienzo, tensor float BCHW)
+
+    def geometry(self, height, width):
+        """
+        Letterbox mínimo (múltiplo de stride) para un fotograma de height x width.
+        Retorna ((alto, ancho) del lienzo, (alto, ancho) redimensionado, escala, (relleno_x, relleno_y)).
+        """
+        scale = min(self.imgsz / height, self.imgsz / width)
+        new_h, new_w = int(round(height * scale)), int(round(width * scale))
+        canvas_h = -(-new_h // self.stride) * self.stride
+        canvas_w = -(-new_w // self.stride) * self.stride
+        return (canvas_h, canvas_w), (new_h, new_w), scale, ((canvas_w - new_w) // 2, (canvas_h - new_h) // 2)
+
+    def _buffers_for(self, shape):
+        buffers = self._buffers.get(shape)
+        if buffers is None:
+            import torch
+            canvas = np.full((self.max_batch, *shape, 3), self.pad_value, dtype=np.uint8)
+            tensor = torch.empty((self.max_batch, 3, *shape), dtype=torch.float32)
+            buffers = self._buffers[shape] = (canvas, torch.from_numpy(canvas), tensor)
+        return buffers
+
+    def letterbox_into(self, frame, canvas, geometry):
+        """Escribe el fotograma BGR con letterbox en canvas (alto, ancho, 3) como RGB, sin arreglos intermedios."""
+        _, (new_h, new_w), _, (left, top) = geometry
+        # Las bandas de relleno se reponen porque el mismo lienzo puede venir de otra forma de entrada
+        canvas[:top] = self.pad_value
+        canvas[top + new_h:] = self.pad_value
+        canvas[top:top + new_h, :left] = self.pad_value
+        canvas[top:top + new_h, left + new_w:] = self.pad_value
+        target = canvas[top:top + new_h, left:left + new_w]
+        if frame.shape[:2] == (new_h, new_w):
+            np.copyto(target, frame)  # El fotograma de trabajo ya viene a 640 px: solo se copia
+        else:
+            cv2.resize(frame, (new_w, new_h), dst=target, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB, dst=canvas)
+
+    def prepare(self, frames):
+        """
+        Prepara un lote. Los fotogramas que comparten forma de lienzo van juntos en un tensor.
+        Retorna [(tensor (n, 3, alto, ancho), índices en frames, geometrías)].
+        """
+        groups = {}
+        for index, frame in enumerate(frames):
+            geometry = self.geometry(*frame.shape[:2])
+            groups.setdefault(geometry[0], []).append((index, geometry))
+        prepared = []
+        for shape, items in groups.items():
+            canvas, canvas_view, tensor = self._buffers_for(shape)
+            count = len(items)
+            for slot, (index, geometry) in enumerate(items):
+                self.letterbox_into(frames[index], canvas[slot], geometry)
+            # uint8 BHWC -> float BCHW en 0..1, escribiendo sobre el tensor preasignado
+            batch = tensor[:count]
+            batch.copy_(canvas_view[:count].permute(0, 3, 1, 2))
+            batch.mul_(1.0 / 255.0)
+            prepared.append((batch, [index for index, _ in items], [geometry for _, geometry in items]))
+        return prepared
+
+    @staticmethod
+    def undo(detections, geometry, frame_shape):
+        """Deshace el letterbox: cajas del lienzo a coordenadas del fotograma original (en el mismo arreglo)."""
+        _, _, scale, (left, top) = geometry
+        height, width = frame_shape[:2]
+        detections[:, [0, 2]] = np.clip((detections[:, [0, 2]] - left) / scale, 0, width)
+        detections[:, [1, 3]] = np.clip((detections[:, [1, 3]] - top) / scale, 0, height)
+        return detections
@@ -0,0 +1,412 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import cv2
+import numpy as np
+
+from camara.cargador import PENDIENTE, CARGANDO, LISTO, ERROR
+from camara.inferencia import EngineStopped
+
+MAX_DETECCIONES = 300  # max_det por defecto de Ultralytics: filas reservadas por ranura para el resultado
+
+# Mensajes de los procesos hacia el motor
+_LISTO = "listo"
+_ERROR = "error"
+_RESULTADO = "resultado"
+
+
+class InferenceTimeout(TimeoutError):
+    """La detección no respondió a tiempo (proceso colgado, reiniciándose o sin ranuras libres)."""
+
+
+def fit_to_slot(frame, slot_bytes):
+    """
+    Reduce el fotograma (manteniendo la proporción) hasta que quepa en slot_bytes.
+    Retorna (fotograma, escala) con la escala (x, y) para llevar las cajas de vuelta, o None si no hizo falta.
+    """
+    if frame.nbytes <= slot_bytes:
+        return frame, None
+    height, width = frame.shape[:2]
+    factor = (slot_bytes / frame.nbytes) ** 0.5
+    new_width, new_height = max(1, int(width * factor)), max(1, int(height * factor))
+    resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    return resized, np.array([width / new_width, height / new_height] * 2, dtype=np.float32)
+
+
+def _load_engine(settings, conf, classes, threads, max_batch):
+    """Carga el modelo del proceso (con su calentamiento) y lo envuelve en un InferenceEngine síncrono."""
+    import torch
+    torch.set_num_threads(threads)  # Los núcleos se reparten entre los procesos
+    from camara.cargador import ModelLoader
+    from camara.inferencia import InferenceEngine
+    imgsz = settings.get("imgsz", 640)
+    loader = ModelLoader(settings["tamano"], settings["backend"], int8=settings["int8"], imgsz=imgsz).start()
+    if not loader.wait():
+        raise RuntimeError(loader.error)
+    engine = InferenceEngine(loader.model, conf=conf, classes=classes, max_batch=max_batch, max_wait=0, imgsz=imgsz)
+    return engine, loader.backend
+
+
+def _worker(settings, conf, classes, threads, max_batch, frames_name, results_name, slot_bytes, slots, tasks, results):
+    """
+    Proceso de inferencia: carga su propio modelo y atiende pedidos (id, ranura, forma, conf, clases).
+    El fotograma se lee de la ranura en memoria compartida y las detecciones se escriben en la misma
+    ranura del bloque de resultados; por el pipe solo viajan índices y la cantidad de filas.
+    """
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    results_shm = shared_memory.SharedMemory(name=results_name)
+    frames = np.ndarray((slots, slot_bytes), dtype=np.uint8, buffer=frames_shm.buf)
+    output = np.ndarray((slots, MAX_DETECCIONES, 6), dtype=np.float32, buffer=results_shm.buf)
+    try:
+        try:
+            engine, backend = _load_engine(settings, conf, classes, threads, max_batch)
+        except Exception as error:
+            results.send((_ERROR, str(error)))
+            return
+        results.send((_LISTO, backend))
+
+        while True:
+            task = tasks.recv()
+            if task is None:
+                break
+            # Micro-lote con lo que ya esté esperando en el pipe, sin demorar el primero
+            batch = [task]
+            while len(batch) < max_batch and tasks.poll():
+                task = tasks.recv()
+                if task is None:
+                    break
+                batch.append(task)
+            engine.conf, engine.classes = batch[-1][3], batch[-1][4]
+            views = [frames[slot, :int(np.prod(shape))].reshape(shape) for _, slot, shape, _, _ in batch]
+            try:
+                detections = engine.detect(views)
+            except Exception as error:
+                for request_id, slot, _, _, _ in batch:
+                    results.send((_RESULTADO, request_id, -1, str(error)))
+                continue
+            for (request_id, slot, _, _, _), result in zip(batch, detections):
+                count = min(len(result), MAX_DETECCIONES)
+                output[slot, :count] = result[:count]
+                results.send((_RESULTADO, request_id, count, None))
+            if task is None:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        views = frames = output = None
+        frames_shm.close()
+        results_shm.close()
+
+
+class _Worker:
+    """Un proceso de inferencia con sus pipes propios: si hay que matarlo no deja a medias un canal compartido."""
+    def __init__(self, index, process, tasks, results):
+        self.index = index
+        self.process = process
+        self.tasks = tasks
+        self.results = results
+        self.ready = False
+        self.failed = False  # No pudo cargar el modelo: no se reinicia
+        self.pending = set()  # ids de pedidos enviados y sin respuesta
+        self.lock = threading.Lock()  # Connection.send no es seguro entre hilos
+
+
+class ProcessInferenceEngine:
+    """
+    Motor de inferencia en procesos aparte, con la misma interfaz que InferenceEngine (submit/infer, conf, classes).
+    Cada proceso carga su modelo, así la detección no compite por el GIL con la captura, el seguimiento y la
+    interfaz, y varias cámaras escalan con los núcleos. Los fotogramas se copian a ranuras de un bloque de memoria
+    compartida (no se serializan) y las detecciones vuelven por otro bloque como arreglos (N, 6) float32.
+    Un fotograma (o recorte ROI) más grande que la ranura se reduce para caber y sus cajas se devuelven en las
+    coordenadas originales; YOLO lo lleva a imgsz de todos modos. Un pedido sin respuesta en timeout segundos falla con InferenceTimeout y el proceso que lo tenía se reinicia,
+    de modo que un modelo trabado nunca bloquea a quien espera el resultado.
+    Hace también de cargador (status, ready, wait, add_done_callback, profile): queda listo con el primer proceso cargado.
+    """
+    def __init__(self, model_settings, workers=2, conf=0.6, classes=None, timeout=5.0, slots_per_worker=4,
+                 max_frame_shape=(640, 640, 3), threads=None, max_batch=4, metrics=None, profile=None):
+        from camara.inferencia import ALLOWED_CLASSES
+        self.model_settings = dict(model_settings)
+        self.workers_count = max(1, workers)
+        self.conf = conf
+        self.classes = list(ALLOWED_CLASSES if classes is None else classes)
+        self.timeout = timeout
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers_count)
+        self.max_batch = max(1, max_batch)
+        self.metrics = metrics  # Tiempo de ida y vuelta "proceso" y contadores bajo la cámara "motor"
+        self.slots = self.workers_count * max(1, slots_per_worker)
+        self.slot_bytes = int(np.prod(max_frame_shape))
+
+        self.profile = profile  # Perfil calibrado ya aplicado a model_settings, con sus latencias medidas
+        self.status = PENDIENTE
+        self.backend = None
+        self.error = None
+        self.frames_run = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+        self._context = multiprocessing.get_context("spawn")  # Sin heredar hilos ni el estado de Qt/torch del padre
+        self._frames_shm = None
+        self._results_shm = None
+        self._frames = None
+        self._output = None
+        self._free = queue.Queue()
+        self._workers = []
+        self._requests = {}  # id -> (future, ranura, proceso, límite, inicio, escala)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._running = False
+        self._stopped = False  # stop() explícito: se rechazan pedidos hasta un nuevo start()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.status == LISTO
+
+    def start(self):
+        """Reserva la memoria compartida y lanza los procesos. Se puede llamar varias veces; tras stop() reactiva el motor."""
+        with self._lock:
+            self._stopped = False
+            if not self._running:
+                self._launch()
+        return self
+
+    def _launch(self):
+        """Arranque con el lock tomado: memoria compartida nueva, todas las ranuras libres y procesos nuevos."""
+        self._running = True
+        self.status = CARGANDO
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._results_shm = shared_memory.SharedMemory(create=True, size=self.slots * MAX_DETECCIONES * 6 * 4)
+        self._frames = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=self._frames_shm.buf)
+        self._output = np.ndarray((self.slots, MAX_DETECCIONES, 6), dtype=np.float32, buffer=self._results_shm.buf)
+        # Cola nueva: las ranuras que quedaron libres antes de stop() no se repiten
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._workers = [self._spawn(index) for index in range(self.workers_count)]
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """Bloquea hasta que haya un proceso listo o hayan fallado todos. Retorna True si se puede detectar."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def add_done_callback(self, callback):
+        """callback(motor) se llama al quedar listo el primer proceso o fallar todos (o de inmediato si ya pasó)."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish_loading(self, status):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.status = status
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def _spawn(self, index):
+        tasks_reader, tasks_writer = self._context.Pipe(duplex=False)
+        results_reader, results_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker, name=f"inferencia-{index}", daemon=True,
+            args=(self.model_settings, self.conf, self.classes, self.threads, self.max_batch,
+                  self._frames_shm.name, self._results_shm.name, self.slot_bytes, self.slots,
+                  tasks_reader, results_writer)
+        )
+        process.start()
+        # El padre se queda solo con sus extremos, así un EOF indica que el proceso murió
+        tasks_reader.close()
+        results_writer.close()
+        return _Worker(index, process, tasks_writer, results_reader)
+
+    def submit(self, frame):
+        """
+        Copia el fotograma a una ranura libre y retorna un Future con el arreglo de detecciones.
+        Con el motor detenido el Future falla de inmediato con EngineStopped, sin volver a lanzar procesos.
+        """
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(EngineStopped("Motor de inferencia detenido"))
+                return future
+            if not self._running:
+                self._launch()
+            free, frames = self._free, self._frames
+        frame, scale = fit_to_slot(np.ascontiguousarray(frame), self.slot_bytes)
+        try:
+            slot = free.get(timeout=self.timeout)
+        except queue.Empty:
+            self._expired(future, "Sin ranuras libres")
+            return future
+        frames[slot, :frame.nbytes] = frame.reshape(-1)
+
+        with self._lock:
+            if self._stopped or free is not self._free:
+                # stop() llegó mientras se copiaba: la ranura pertenece a memoria que ya se liberó
+                future.set_exception(EngineStopped("Motor de inferencia detenido"))
+                return future
+            workers = [worker for worker in self._workers if worker.ready]
+            if not workers:
+                self._free.put(slot)
+                self._expired(future, "Sin procesos de inferencia listos")
+                return future
+            worker = min(workers, key=lambda candidate: len(candidate.pending))  # El menos cargado
+            request_id = self._next_id
+            self._next_id += 1
+            started = time.monotonic()
+            self._requests[request_id] = (future, slot, worker, started + self.timeout, started, scale)
+            worker.pending.add(request_id)
+        try:
+            with worker.lock:
+                worker.tasks.send((request_id, slot, frame.shape, self.conf, self.classes))
+        except (OSError, ValueError):
+            pass  # El proceso se está reiniciando: el pedido vence y falla por timeout
+        return future
+
+    def infer(self, frame, timeout=None):
+        """Atajo bloqueante para un productor: retorna el arreglo (N, 6) de detecciones."""
+        return self.submit(frame).result(timeout=timeout)
+
+    def _expired(self, future, reason):
+        self.timeouts += 1
+        if self.metrics is not None:
+            self.metrics.inc("inferencias_vencidas", "motor")
+        future.set_exception(InferenceTimeout(reason))
+
+    def _release(self, request_id):
+        """Quita el pedido de los pendientes y libera su ranura. Retorna (future, ranura, inicio, escala) o None."""
+        with self._lock:
+            request = self._requests.pop(request_id, None)
+            if request is None:
+                return None  # Respuesta de un proceso ya reiniciado
+            future, slot, worker, _, started, scale = request
+            worker.pending.discard(request_id)
+        return future, slot, started, scale
+
+    def _collect(self):
+        """Hilo del motor: recibe los resultados y vigila los pedidos vencidos y los procesos caídos."""
+        while self._running:
+            readers = {worker.results: worker for worker in self._workers if not worker.failed}
+            for reader in wait(list(readers), timeout=0.05):
+                worker = readers[reader]
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    if worker.failed:
+                        worker.process.join(timeout=1)
+                    elif self._running:
+                        self._restart(worker, "terminó inesperadamente")
+                    continue
+                self._handle(worker, message)
+            self._check_deadlines()
+
+    def _handle(self, worker, message):
+        kind = message[0]
+        if kind == _LISTO:
+            worker.ready = True
+            self.backend = message[1]
+            self._finish_loading(LISTO)
+        elif kind == _ERROR:
+            self.error = message[1]
+            print(f"Error cargando el modelo en {worker.process.name}: {self.error}")
+            worker.failed = True
+            if all(other.failed for other in self._workers):
+                self._finish_loading(ERROR)
+        elif kind == _RESULTADO:
+            _, request_id, count, error = message
+            released = self._release(request_id)
+            if released is None:
+                return
+            future, slot, started, scale = released
+            if error is not None:
+                self._free.put(slot)
+                future.set_exception(RuntimeError(error))
+                return
+            result = self._output[slot, :count].copy()
+            self._free.put(slot)
+            if scale is not None:
+                result[:, :4] *= scale
+            self.frames_run += 1
+            if self.metrics is not None:
+                self.metrics.observe("proceso", "motor", time.monotonic() - started)
+            future.set_result(result)
+
+    def _check_deadlines(self):
+        now = time.monotonic()
+        with self._lock:
+            stuck = {worker for _, _, worker, deadline, _, _ in self._requests.values() if deadline <= now}
+        for worker in stuck:
+            self._restart(worker, f"no respondió en {self.timeout:g} s")
+
+    def _restart(self, worker, reason):
+        """Mata el proceso, falla sus pedidos pendientes y lanza uno nuevo en su lugar."""
+        print(f"Proceso {worker.process.name} {reason}; se reinicia")
+        with self._lock:
+            worker.ready = False
+        worker.process.terminate()
+        worker.process.join(timeout=2)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=1)
+        # Las ranuras se liberan recién con el proceso muerto: ya no puede escribir en ellas
+        for request_id in list(worker.pending):
+            released = self._release(request_id)
+            if released is not None:
+                future, slot, _, _ = released
+                self._free.put(slot)
+                self._expired(future, f"{worker.process.name} {reason}")
+        worker.tasks.close()
+        worker.results.close()
+        self.restarts += 1
+        if self.metrics is not None:
+            self.metrics.inc("reinicios_proceso", "motor")
+        replacement = self._spawn(worker.index)
+        with self._lock:
+            self._workers[worker.index] = replacement
+
+    def stop(self):
+        """Detiene los procesos, cancela lo pendiente y libera la memoria compartida."""
+        with self._lock:
+            self._stopped = True
+            if not self._running:
+                return
+            self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for worker in self._workers:
+            try:
+                with worker.lock:
+                    worker.tasks.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join(timeout=1)
+            worker.tasks.close()
+            worker.results.close()
+        with self._lock:
+            requests, self._requests = self._requests, {}
+        for future, *_ in requests.values():
+            future.cancel()
+        self._frames = self._output = None
+        for shm in (self._frames_shm, self._results_shm):
+            try:
+                shm.close()
+            except BufferError:
+                pass  # Un submit() en curso aún tiene la vista; el bloque se libera cuando la suelta
+            shm.unlink()
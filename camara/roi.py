@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def roi_from_points(points, frame_size, padding=80, min_size=160):
+    """
+    Calcula la región de interés (x1, y1, x2, y2) que contiene todos los puntos (líneas y zonas)
+    con un margen de padding píxeles, sin salir del fotograma (ancho, alto).
+    """
+    width, height = frame_size
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if not len(points):
+        return 0, 0, width, height
+    x1, y1 = points.min(axis=0) - padding
+    x2, y2 = points.max(axis=0) + padding
+
+    # Tamaño mínimo para que los vehículos completos quepan en el recorte
+    for low, high, limit in ((0, 2, width), (1, 3, height)):
+        box = [x1, y1, x2, y2]
+        missing = min_size - (box[high] - box[low])
+        if missing > 0:
+            box[low] -= missing / 2
+            box[high] += missing / 2
+        x1, y1, x2, y2 = box
+
+    x1, y1 = max(0, int(x1)), max(0, int(y1))
+    x2, y2 = min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2)))
+    return x1, y1, x2, y2
+
+
+def crop_roi(frame, roi, scale=1.0):
+    """
+    Recorta el fotograma original. roi está en coordenadas de trabajo y scale es
+    ancho_original / ancho_de_trabajo, así el recorte conserva toda la resolución de la cámara.
+    """
+    x1, y1, x2, y2 = (int(round(v * scale)) for v in roi)
+    return frame[y1:y2, x1:x2]
+
+
+def boxes_from_roi(detections, roi, scale=1.0):
+    """Lleva las cajas detectadas en el recorte de vuelta a coordenadas de trabajo del fotograma."""
+    detections = detections.copy()
+    detections[:, [0, 2]] = detections[:, [0, 2]] / scale + roi[0]
+    detections[:, [1, 3]] = detections[:, [1, 3]] / scale + roi[1]
+    return detections
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    IoU entre todas las cajas de boxes_a (N, 4) y boxes_b (M, 4) en formato x1, y1, x2, y2. Retorna (N, M).
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class VehicleTracker:
+    """
+    Seguimiento multi-objeto por IoU con memoria acotada.
+    Cada pista guarda su caja, su centro anterior y actual, y cuándo se vio por última vez.
+    Las pistas que no se ven durante max_age segundos se eliminan y nunca hay más de max_tracks vivas.
+    """
+    def __init__(self, iou_threshold=0.3, max_age=1.5, max_tracks=64):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.max_tracks = max_tracks
+        self.next_id = 1
+        self.ids = np.empty(0, dtype=np.int64)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.centers = np.empty((0, 2), dtype=np.float32)
+        self.prev_centers = np.empty((0, 2), dtype=np.float32)
+        self.last_seen = np.empty(0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _match(self, boxes):
+        """
+        Asociación en una sola pasada vectorizada: una pista y una detección se emparejan
+        cuando cada una es la mejor opción de la otra y el IoU supera el umbral.
+        """
+        track_idx = np.empty(0, dtype=np.int64)
+        det_idx = np.empty(0, dtype=np.int64)
+        if len(self.ids) and len(boxes):
+            iou = iou_matrix(self.boxes, boxes)
+            best_det = iou.argmax(axis=1)
+            best_track = iou.argmax(axis=0)
+            tracks = np.arange(len(self.ids))
+            mutual = (best_track[best_det] == tracks) & (iou[tracks, best_det] >= self.iou_threshold)
+            track_idx = tracks[mutual]
+            det_idx = best_det[mutual]
+        return track_idx, det_idx
+
+    def update(self, boxes, timestamp):
+        """
+        Actualiza las pistas con las cajas del fotograma (N, 4).
+        Retorna (ids, centros_anteriores, centros_actuales) alineados con las cajas de entrada.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+        track_idx, det_idx = self._match(boxes)
+        det_ids = np.empty(len(boxes), dtype=np.int64)
+        det_prev = centers.copy()
+
+        # Pistas emparejadas: el centro actual pasa a ser el anterior
+        det_ids[det_idx] = self.ids[track_idx]
+        det_prev[det_idx] = self.centers[track_idx]
+        self.prev_centers[track_idx] = self.centers[track_idx]
+        self.centers[track_idx] = centers[det_idx]
+        self.boxes[track_idx] = boxes[det_idx]
+        self.last_seen[track_idx] = timestamp
+
+        # Detecciones sin pista: nuevas pistas
+        unmatched = np.ones(len(boxes), dtype=bool)
+        unmatched[det_idx] = False
+        new_count = int(unmatched.sum())
+        if new_count:
+            new_ids = np.arange(self.next_id, self.next_id + new_count, dtype=np.int64)
+            self.next_id += new_count
+            det_ids[unmatched] = new_ids
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, boxes[unmatched]])
+            self.centers = np.concatenate([self.centers, centers[unmatched]])
+            self.prev_centers = np.concatenate([self.prev_centers, centers[unmatched]])
+            self.last_seen = np.concatenate([self.last_seen, np.full(new_count, timestamp)])
+
+        self._evict(timestamp)
+        return det_ids, det_prev, centers
+
+    def _evict(self, timestamp):
+        """Elimina las pistas envejecidas y, si aún sobran, las vistas hace más tiempo."""
+        keep = (timestamp - self.last_seen) <= self.max_age
+        if keep.sum() > self.max_tracks:
+            newest = np.argsort(self.last_seen, kind="stable")[-self.max_tracks:]
+            keep = np.zeros(len(self.ids), dtype=bool)
+            keep[newest] = True
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.boxes = self.boxes[keep]
+            self.centers = self.centers[keep]
+            self.prev_centers = self.prev_centers[keep]
+            self.last_seen = self.last_seen[keep]
+
+    def live_ids(self):
+        return set(self.ids.tolist())
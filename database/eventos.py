@@ -0,0 +1,177 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from database.carga_de_datos import load_data
+
+DB_PATH = "database/eventos.db"
+
+ENTRADA = "entrada"
+SALIDA = "salida"
+AJUSTE = "ajuste"    # Botones +/- de la interfaz
+HORARIO = "horario"  # Cambio automático de los ejecutivos por horario administrativo
+CAPACIDAD = "capacidad"  # Cambio de capacidad por configuración (delta 0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    tipo TEXT NOT NULL,
+    origen TEXT NOT NULL,
+    seccion TEXT NOT NULL,
+    delta INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    ultimo_evento INTEGER NOT NULL,
+    datos TEXT NOT NULL
+);
+"""
+
+
+def connect(file_path=DB_PATH):
+    """Conexión SQLite en modo WAL: las lecturas no bloquean al escritor y un corte no corrompe la base."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(file_path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+class EventStore:
+    """
+    Registro de solo-anexado de cada cambio de los contadores (entradas, salidas, ajustes manuales).
+    Las escrituras pasan por una cola y un hilo escritor que confirma en lotes (group commit),
+    así quien registra nunca espera al disco. Al iniciar, los contadores se reconstruyen desde la
+    última foto (snapshot) más los eventos posteriores.
+    """
+    def __init__(self, file_path=DB_PATH, batch_size=256, flush_interval=0.2, idle_interval=60.0):
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.idle_interval = idle_interval  # Sin eventos, los hooks igual corren cada idle_interval segundos
+        # Funciones hook(connection, events, now) que el hilo escritor llama dentro de la misma transacción
+        # de cada lote, con events = [(ts, tipo, origen, seccion, delta)]
+        self.hooks = []
+        self._queue = queue.Queue()
+        self._connection = connect(file_path)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def record(self, tipo, seccion, delta, origen="manual", ts=None):
+        """Registra un cambio de ocupados_<seccion> en delta. No bloquea."""
+        event = (time.time() if ts is None else ts, tipo, origen, seccion, int(delta))
+        self._queue.put(("evento", event))
+
+    def on_state_change(self, changes):
+        """Listener de OccupancyState: registra cada cambio [(tipo, origen, sección, delta)]."""
+        for tipo, origen, seccion, delta in changes:
+            self.record(tipo, seccion, delta, origen=origen)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def snapshot(self, data):
+        """Guarda una foto completa de los contadores; queda ordenada después de los eventos ya encolados."""
+        self._queue.put(("snapshot", (time.time(), json.dumps(data))))
+
+    def flush(self, timeout=5.0):
+        """Espera a que todo lo encolado quede confirmado en disco."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        self._queue.put(("cerrar", None))
+        self._writer.join(timeout=5.0)
+
+    def _write_loop(self):
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.idle_interval)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + self.flush_interval
+            # Juntar lo que llegue en la ventana de flush_interval en una sola transacción
+            while batch and len(batch) < self.batch_size and batch[-1][0] not in ("flush", "cerrar"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            running = self._commit(batch)
+        self._connection.close()
+
+    def _commit(self, batch):
+        running = True
+        waiting = []
+        events = []
+        with self._connection:
+            for kind, payload in batch:
+                if kind == "evento":
+                    events.append(payload)
+                    self._connection.execute(
+                        "INSERT INTO eventos (ts, tipo, origen, seccion, delta) VALUES (?, ?, ?, ?, ?)", payload
+                    )
+                elif kind == "snapshot":
+                    ts, datos = payload
+                    self._connection.execute(
+                        "INSERT INTO snapshots (ts, ultimo_evento, datos) "
+                        "VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM eventos), ?)", (ts, datos)
+                    )
+                elif kind == "flush":
+                    waiting.append(payload)
+                elif kind == "cerrar":
+                    running = False
+            now = time.time()
+            for hook in self.hooks:
+                try:
+                    hook(self._connection, events, now)
+                except Exception as error:  # Un hook con errores no debe detener el registro de eventos
+                    print(f"Error en hook del registro de eventos: {error}")
+        for done in waiting:
+            done.set()
+        return running
+
+    def rebuild(self):
+        """
+        Reconstruye los contadores: última foto + suma de los eventos posteriores por sección.
+        Retorna un diccionario vacío si la base aún no tiene datos.
+        """
+        connection = connect(self.file_path)
+        try:
+            row = connection.execute(
+                "SELECT ultimo_evento, datos FROM snapshots ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            last_event, data = (row[0], json.loads(row[1])) if row else (0, {})
+            for seccion, delta in connection.execute(
+                "SELECT seccion, SUM(delta) FROM eventos WHERE id > ? GROUP BY seccion", (last_event,)
+            ):
+                key = f"ocupados_{seccion}"
+                data[key] = data.get(key, 0) + delta
+            return data
+        finally:
+            connection.close()
+
+
+def load_counters(event_store, legacy_path="database/datos.txt"):
+    """
+    Contadores al iniciar: reconstrucción desde el registro o, si aún está vacío,
+    migración de datos.txt guardándolo como primera foto.
+    """
+    data = event_store.rebuild()
+    if not data:
+        data = load_data(legacy_path)
+        if data:
+            event_store.snapshot(data)
+    return data
@@ -0,0 +1,152 @@
+import time
+
+from database.eventos import connect
+
+MINUTO = 60
+HORA = 3600
+DIA = 86400
+RESOLUCIONES = (MINUTO, HORA, DIA)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocupacion (
+    resolucion INTEGER NOT NULL,
+    seccion TEXT NOT NULL,
+    inicio REAL NOT NULL,
+    minimo INTEGER NOT NULL,
+    maximo INTEGER NOT NULL,
+    area REAL NOT NULL,
+    segundos REAL NOT NULL,
+    ultimo INTEGER NOT NULL,
+    PRIMARY KEY (resolucion, seccion, inicio)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO ocupacion (resolucion, seccion, inicio, minimo, maximo, area, segundos, ultimo)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolucion, seccion, inicio) DO UPDATE SET
+    minimo = MIN(minimo, excluded.minimo),
+    maximo = MAX(maximo, excluded.maximo),
+    area = area + excluded.area,
+    segundos = segundos + excluded.segundos,
+    ultimo = excluded.ultimo
+"""
+
+
+def bucket_start(ts, resolution):
+    """Inicio del intervalo de resolution segundos que contiene ts, alineado a la hora local."""
+    offset = time.localtime(ts).tm_gmtoff
+    return ts - (ts + offset) % resolution
+
+
+class OccupancyHistory:
+    """
+    Historial de ocupación por sección, preagregado por minuto, hora y día.
+    Cada intervalo guarda mínimo, máximo, último valor y el área (ocupados x segundos), de modo que el
+    promedio ponderado por tiempo es area / segundos. Se actualiza de forma incremental desde el hilo
+    escritor de EventStore, en la misma transacción que los eventos, sin volver a leer eventos crudos.
+    """
+    def __init__(self, event_store, levels, minute_days=35, hour_days=730, raw_days=90):
+        self.event_store = event_store
+        self.file_path = event_store.file_path
+        # Retención: los minutos y las horas se descartan pasado el plazo; los días se conservan siempre
+        self.retention = {MINUTO: minute_days * DIA, HORA: hour_days * DIA}
+        self.raw_days = raw_days  # Eventos crudos ya cubiertos por una foto
+        self.levels = {}    # sección -> ocupados actuales
+        self.since = {}     # sección -> momento desde el que rige el nivel actual
+        self.pending = {}   # (resolución, sección, inicio) -> [mínimo, máximo, área, segundos, último]
+        self.last_cleanup = 0.0
+        connection = connect(self.file_path)
+        connection.executescript(_SCHEMA)
+        connection.close()
+        now = time.time()
+        for key, value in levels.items():
+            if key.startswith("ocupados_"):
+                self.levels[key[len("ocupados_"):]] = value
+                self.since[key[len("ocupados_"):]] = now
+        event_store.add_hook(self.on_commit)
+
+    def _accumulate(self, section, level, start, end):
+        """Suma el nivel constante entre start y end a los intervalos de cada resolución."""
+        for resolution in RESOLUCIONES:
+            t = start
+            while True:
+                bucket = bucket_start(t, resolution)
+                stop = min(end, bucket + resolution)
+                entry = self.pending.get((resolution, section, bucket))
+                if entry is None:
+                    self.pending[(resolution, section, bucket)] = [level, level, level * (stop - t), stop - t, level]
+                else:
+                    entry[0] = min(entry[0], level)
+                    entry[1] = max(entry[1], level)
+                    entry[2] += level * (stop - t)
+                    entry[3] += stop - t
+                    entry[4] = level
+                if stop >= end:
+                    break
+                t = stop
+
+    def _advance(self, section, ts):
+        since = self.since.get(section, ts)
+        if ts > since:
+            self._accumulate(section, self.levels.get(section, 0), since, ts)
+            self.since[section] = ts
+
+    def on_commit(self, connection, events, now):
+        """Hook de EventStore: aplica los eventos del lote y escribe los intervalos tocados."""
+        for ts, _, _, section, delta in events:
+            self._advance(section, ts)
+            level = self.levels.get(section, 0) + delta
+            self.levels[section] = level
+            self.since.setdefault(section, ts)
+            # Un cambio instantáneo también cuenta para mínimo y máximo
+            self._accumulate(section, level, ts, ts)
+        for section in list(self.levels):
+            self._advance(section, now)
+        connection.executemany(_UPSERT, [
+            (resolution, section, bucket, *entry) for (resolution, section, bucket), entry in self.pending.items()
+        ])
+        self.pending.clear()
+        if now - self.last_cleanup >= HORA:
+            self.cleanup(connection, now)
+
+    def cleanup(self, connection, now):
+        """Retención: borra intervalos finos vencidos y eventos crudos antiguos ya cubiertos por una foto."""
+        for resolution, seconds in self.retention.items():
+            connection.execute("DELETE FROM ocupacion WHERE resolucion = ? AND inicio < ?", (resolution, now - seconds))
+        connection.execute(
+            "DELETE FROM eventos WHERE ts < ? AND id <= "
+            "(SELECT COALESCE(MAX(ultimo_evento), 0) FROM snapshots)", (now - self.raw_days * DIA,)
+        )
+        connection.execute(
+            "DELETE FROM snapshots WHERE ts < ? AND id < (SELECT MAX(id) FROM snapshots)", (now - self.raw_days * DIA,)
+        )
+        self.last_cleanup = now
+
+    def query(self, section, resolution, start, end):
+        """
+        Intervalos de la sección entre start y end (epoch).
+        Retorna [(inicio, mínimo, máximo, promedio)], usando solo la tabla preagregada.
+        """
+        connection = connect(self.file_path)
+        try:
+            rows = connection.execute(
+                "SELECT inicio, minimo, maximo, area / segundos FROM ocupacion "
+                "WHERE resolucion = ? AND seccion = ? AND inicio >= ? AND inicio < ? AND segundos > 0 ORDER BY inicio",
+                (resolution, section, bucket_start(start, resolution), end)
+            ).fetchall()
+        finally:
+            connection.close()
+        return rows
+
+    def typical(self, section, weekday, hour, start, end):
+        """
+        Ocupación promedio de la sección un día de la semana (0 = lunes) a una hora, entre start y end.
+        Por ejemplo typical("normal", 0, 10, ...) responde qué tan lleno está el estacionamiento los lunes a las 10:00.
+        """
+        rows = self.query(section, HORA, start, end)
+        values = [
+            average for inicio, _, _, average in rows
+            if time.localtime(inicio).tm_wday == weekday and time.localtime(inicio).tm_hour == hour
+        ]
+        return sum(values) / len(values) if values else None
@@ -0,0 +1,112 @@
+"""
+Contador de estacionamiento sin interfaz gráfica.
+Ejecuta captura, detección, seguimiento y conteo como un servicio, sin importar Qt ni dibujar fotogramas,
+y registra cada entrada y salida en el mismo registro de eventos que usa la aplicación.
+
+Uso:
+    python headless.py [--config config.json] [--eventos database/eventos.db] [--camara NOMBRE] [--foto-cada 300]
+"""
+import argparse
+import signal
+import threading
+import time
+
+from camara.arranque import create_detector, create_engine, create_pipeline
+from camara.procesos import ProcessInferenceEngine
+from camara.metricas import setup_metrics
+from api.servidor import setup_api
+from config import (
+    CONFIG_PATH, load_config, load_cameras, load_capacities, load_detection_settings, load_model_settings,
+    load_metrics_settings, load_api_settings, ConfigWatcher, apply_config
+)
+from database.eventos import EventStore, DB_PATH, load_counters
+from database.historial import OccupancyHistory
+from ocupacion import OccupancyState
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Conteo de vehículos sin interfaz gráfica.")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración JSON")
+    parser.add_argument("--eventos", default=DB_PATH, help="Base SQLite del registro de eventos")
+    parser.add_argument("--camara", action="append", help="Nombre de la cámara a procesar (se puede repetir)")
+    parser.add_argument("--foto-cada", type=float, default=300.0, help="Segundos entre fotos de los contadores")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args.config)
+    cameras = load_cameras(config)
+    if args.camara:
+        cameras = [camera for camera in cameras if camera["nombre"] in args.camara]
+    if not cameras:
+        print("No hay cámaras configuradas.")
+        return 1
+
+    detection = load_detection_settings(config)
+    metrics = setup_metrics(load_metrics_settings(config))
+    loader = create_detector(load_model_settings(config), detection, metrics).start()
+    if not loader.wait():
+        if isinstance(loader, ProcessInferenceEngine):
+            loader.stop()
+        return 1
+    engine = create_engine(loader, detection, metrics)
+
+    # Mismo estado de ocupación que la aplicación: el registro, el historial y la API escuchan sus cambios
+    event_store = EventStore(args.eventos)
+    data = load_counters(event_store)
+    occupancy = OccupancyState.from_data(data, load_capacities(config))
+    occupancy.add_listener(event_store.on_state_change)
+    OccupancyHistory(event_store, occupancy.data())
+    api = setup_api(load_api_settings(config))
+    if api is not None:
+        api.publish(occupancy.sections())
+        occupancy.add_listener(lambda changes: api.publish(occupancy.sections()))
+
+    def snapshot():
+        # Se conservan el horario administrativo y demás datos no relacionados con la ocupación
+        occupancy.snapshot(event_store, data)
+
+    pipelines = []
+    threads = []
+    for camera in cameras:
+        pipeline = create_pipeline(
+            camera, engine, loader.profile, metrics,
+            on_entry=lambda name=camera["nombre"]: occupancy.vehicle_entered(name),
+            on_exit=lambda name=camera["nombre"]: occupancy.vehicle_exited(name)
+        )
+        thread = threading.Thread(target=pipeline.run, name=camera["nombre"], daemon=True)
+        thread.start()
+        pipelines.append(pipeline)
+        threads.append(thread)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    # Los eventos se escriben al ocurrir; la foto periódica solo acorta la reconstrucción al iniciar.
+    # Entre fotos se revisa config.json para aplicar cambios en caliente
+    watcher = ConfigWatcher(args.config)
+    last_snapshot = time.monotonic()
+    while not stop_event.wait(2.0):
+        new_config = watcher.poll()
+        if new_config is not None:
+            apply_config(new_config, engine, occupancy, pipelines)
+        if time.monotonic() - last_snapshot >= args.foto_cada:
+            snapshot()
+            last_snapshot = time.monotonic()
+        if not any(thread.is_alive() for thread in threads):
+            break
+
+    for pipeline in pipelines:
+        pipeline.stop()
+    for thread in threads:
+        thread.join(timeout=5)
+    engine.stop()
+    snapshot()
+    event_store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+import threading
+
+from config import CAPACIDADES
+from database.eventos import ENTRADA, SALIDA, AJUSTE, CAPACIDAD
+
+
+class OccupancyState:
+    """
+    Estado de ocupación: única fuente de verdad de los contadores y capacidades de cada sección.
+    Cada cambio se notifica a los listeners como una lista [(tipo, origen, sección, delta)], en el mismo
+    orden en que se aplicó; quien muestra, guarda o publica los datos escucha aquí en vez de leer etiquetas.
+    """
+    def __init__(self, capacities=None, counts=None):
+        self.capacities = dict(capacities or CAPACIDADES)
+        self.counts = {section: 0 for section in self.capacities}
+        for section, value in (counts or {}).items():
+            if section in self.counts:
+                self.counts[section] = value
+        self.listeners = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_data(cls, data, capacities=None):
+        """Crea el estado desde un diccionario con claves ocupados_<sección> (datos.txt, fotos del registro)."""
+        counts = {key[len("ocupados_"):]: value for key, value in data.items() if key.startswith("ocupados_")}
+        return cls(capacities, counts)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, changes):
+        for listener in self.listeners:
+            listener(changes)
+
+    def _apply(self, changes):
+        """Aplica [(tipo, origen, sección, delta)] y notifica; se llama con el lock tomado."""
+        for _, _, section, delta in changes:
+            self.counts[section] += delta
+        self._notify(changes)
+
+    def vehicle_entered(self, origen="camara"):
+        """Un vehículo entra: ocupa un espacio normal si queda alguno. Retorna True si se contó."""
+        with self._lock:
+            if self.capacities["normal"] - self.counts["normal"] <= 0:  # Verifica si hay espacio disponible
+                return False
+            self._apply([(ENTRADA, origen, "normal", 1)])
+            return True
+
+    def vehicle_exited(self, origen="camara"):
+        """Un vehículo sale: libera un espacio normal si hay autos ocupando. Retorna True si se contó."""
+        with self._lock:
+            if self.counts["normal"] <= 0:  # Verifica si hay autos ocupando espacios
+                return False
+            self._apply([(SALIDA, origen, "normal", -1)])
+            return True
+
+    def adjust(self, section, change, origen="manual"):
+        """
+        Ajuste manual con los botones +/-, dentro de 0..capacidad de la sección.
+        Salvo en ejecutivos, el ajuste también se refleja en el total de ocupados normales.
+        """
+        with self._lock:
+            new_count = self.counts[section] + change
+            if not 0 <= new_count <= self.capacities[section]:
+                return False
+            changes = [(AJUSTE, origen, section, change)]
+            if section != "ejecutivo":
+                changes.append((AJUSTE, origen, "normal", change))
+            self._apply(changes)
+            return True
+
+    def set(self, section, value, tipo, origen):
+        """Fija el valor absoluto de una sección (por ejemplo los ejecutivos según el horario)."""
+        with self._lock:
+            delta = value - self.counts[section]
+            if delta:
+                self._apply([(tipo, origen, section, delta)])
+
+    def set_capacities(self, capacities, origen="configuracion"):
+        """
+        Aplica capacidades nuevas (recarga de configuración). Las secciones nuevas empiezan vacías; los ocupados
+        actuales no se modifican. Cada sección cambiada se notifica con delta 0 para que se redibuje y publique.
+        """
+        with self._lock:
+            changes = []
+            for section, capacity in capacities.items():
+                if self.capacities.get(section) != capacity:
+                    self.capacities[section] = capacity
+                    self.counts.setdefault(section, 0)
+                    changes.append((CAPACIDAD, origen, section, 0))
+            if changes:
+                self._notify(changes)
+
+    def data(self):
+        """Contadores con las claves de datos.txt (ocupados_<sección>)."""
+        with self._lock:
+            return {f"ocupados_{section}": value for section, value in self.counts.items()}
+
+    def snapshot(self, event_store, extra=None):
+        """
+        Encola en el registro una foto de los contadores tomada con el lock. Los listeners encolan los eventos
+        con el mismo lock, así la foto queda detrás de todos los eventos que ya incluye y antes de los siguientes.
+        extra agrega datos que no son de ocupación (por ejemplo el horario administrativo).
+        """
+        with self._lock:
+            event_store.snapshot(dict(extra or {}, **self.data()))
+
+    def sections(self):
+        """Ocupados y capacidad de cada sección tal como se muestran: los ejecutivos también ocupan espacios normales."""
+        with self._lock:
+            sections = {
+                section: {"ocupados": value, "capacidad": self.capacities[section]}
+                for section, value in self.counts.items()
+            }
+        if "ejecutivo" in sections:
+            sections["normal"]["ocupados"] += sections["ejecutivo"]["ocupados"]
+        return sections
@@ -0,0 +1,189 @@
+"""
+Procesamiento de videos grabados, tan rápido como permita el equipo.
+Cada video se divide en segmentos de tiempo que se reparten en un pool de procesos; cada segmento
+arranca unos segundos antes (solape) para que las pistas que cruzan el borde ya estén formadas,
+y solo se cuentan los cruces dentro de su propio tramo. El resultado es una lista de entradas/salidas
+con marca de tiempo por archivo.
+
+Uso:
+    python procesar_videos.py video1.mp4 [video2.mp4 ...] [--camara NOMBRE] [--procesos 4]
+        [--segmento 300] [--solape 5] [--salida resultados] [--inicio 2026-10-13T08:00:00]
+"""
+import argparse
+import csv
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import cv2
+
+from camara.calibracion import apply_profile, load_matching_profile
+from camara.cruces import ENTRADA, SALIDA
+from config import CONFIG_PATH, load_config, load_cameras, load_model_settings, load_detection_settings
+
+_engine = None  # Motor de inferencia propio de cada proceso del pool
+_model_settings = None
+
+
+def _init_worker(model_settings, threads):
+    """
+    Inicializa cada proceso: limita los hilos de torch para no sobre-suscribir la CPU. Los hilos configurados
+    (o los del perfil) son para un solo proceso, así que se usan solo si no superan la parte de este proceso.
+    """
+    global _engine, _model_settings
+    import torch
+    torch.set_num_threads(min(threads, model_settings["hilos"] or threads))
+    _engine = None
+    _model_settings = model_settings
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        from camara.cargador import ModelLoader
+        from camara.inferencia import InferenceEngine
+        # Mismo modelo que el sistema en vivo: tamaño, backend, INT8 e imgsz de la configuración y del perfil
+        loader = ModelLoader(
+            _model_settings["tamano"], _model_settings["backend"], int8=_model_settings["int8"],
+            imgsz=_model_settings["imgsz"]
+        ).start()
+        if not loader.wait():
+            raise RuntimeError(f"No se pudo cargar el modelo: {loader.error}")
+        _engine = InferenceEngine(
+            loader.model, conf=_model_settings["conf"], classes=_model_settings["clases"], max_batch=1, max_wait=0,
+            imgsz=loader.imgsz
+        )
+    return _engine
+
+
+def video_info(video_path):
+    """Retorna (fps, duración en segundos) del video."""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return fps, frames / fps if frames > 0 else 0.0
+
+
+def process_segment(video_path, camera, start, end, overlap):
+    """
+    Procesa el tramo [start, end) del video (en segundos) y retorna la lista de (segundo, tipo) de los cruces.
+    Los fotogramas desde start - overlap solo sirven para formar las pistas.
+    """
+    from camara.arranque import create_pipeline
+
+    events = []
+    current = {"time": 0.0}
+
+    def record(kind):
+        if start <= current["time"] < end:
+            events.append((current["time"], kind))
+
+    # Mismo armado que las cámaras en vivo, sin capturas del stream principal
+    pipeline = create_pipeline(
+        camera, _get_engine(), name=f"{os.path.basename(video_path)}@{start:.0f}s", main_url=None,
+        on_entry=lambda: record(ENTRADA), on_exit=lambda: record(SALIDA)
+    )
+    # Se procesa en tiempo del video: la latencia de inferencia no debe bajar el muestreo
+    pipeline.sampler.backoff = 0
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"No se pudo abrir {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_index = int(max(0.0, start - overlap) * fps)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    while True:
+        current["time"] = frame_index / fps
+        if current["time"] >= end:
+            break
+        ret, frame = cap.read()
+        if not ret:
+            break
+        pipeline.process_frame(frame, current["time"])
+        frame_index += 1
+    cap.release()
+    return events
+
+
+def split_segments(duration, segment, overlap):
+    """
+    Tramos (inicio, fin, solape) que cubren todo el video. El último no tiene fin (math.inf) y se lee hasta
+    el final del archivo, porque la duración sale de CAP_PROP_FRAME_COUNT y es solo una estimación;
+    con duración desconocida (0) queda un único tramo con todo el video.
+    """
+    count = max(1, math.ceil(duration / segment))
+    return [
+        (i * segment, (i + 1) * segment if i < count - 1 else math.inf, overlap if i else 0.0) for i in range(count)
+    ]
+
+
+def write_events(video_path, events, output_dir, started_at=None):
+    os.makedirs(output_dir, exist_ok=True)
+    output = os.path.join(output_dir, os.path.splitext(os.path.basename(video_path))[0] + "_eventos.csv")
+    with open(output, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["segundo", "marca_tiempo", "tipo"])
+        for second, kind in events:
+            if started_at:
+                stamp = (started_at + timedelta(seconds=second)).isoformat(timespec="milliseconds")
+            else:
+                stamp = str(timedelta(seconds=round(second, 3)))
+            writer.writerow([f"{second:.3f}", stamp, kind])
+    return output
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Conteo de entradas y salidas en videos grabados.")
+    parser.add_argument("videos", nargs="+", help="Archivos de video a procesar")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Archivo de configuración JSON")
+    parser.add_argument("--camara", help="Cámara cuyas líneas se usan (por defecto la primera)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    parser.add_argument("--segmento", type=float, default=300.0, help="Duración de cada tramo en segundos")
+    parser.add_argument("--solape", type=float, default=5.0, help="Segundos previos para formar las pistas")
+    parser.add_argument("--salida", default="resultados", help="Carpeta para los CSV de eventos")
+    parser.add_argument("--inicio", type=datetime.fromisoformat, help="Fecha y hora del inicio de los videos (ISO)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args.config)
+    cameras = load_cameras(config)
+    if args.camara:
+        cameras = [camera for camera in cameras if camera["nombre"] == args.camara]
+    if not cameras:
+        print("No hay cámaras configuradas.")
+        return 1
+    camera = cameras[0]
+
+    # El perfil calibrado se aplica aquí y viaja a cada proceso; los procesos no calibran por su cuenta
+    model_settings = load_model_settings(config)
+    if model_settings["perfil"]:
+        model_settings = apply_profile(model_settings, load_matching_profile(model_settings))
+    threads = max(1, (os.cpu_count() or 1) // args.procesos)
+    with ProcessPoolExecutor(args.procesos, initializer=_init_worker,
+                             initargs=(dict(model_settings, **load_detection_settings(config)), threads)) as pool:
+        jobs = {}
+        for video_path in args.videos:
+            _, duration = video_info(video_path)
+            if duration <= 0:
+                print(f"{video_path}: duración desconocida, se procesa completo en un solo tramo")
+            jobs[video_path] = [
+                pool.submit(process_segment, video_path, camera, start, end, overlap)
+                for start, end, overlap in split_segments(duration, args.segmento, args.solape)
+            ]
+
+        for video_path, futures in jobs.items():
+            # Unir los tramos: cada cruce pertenece a un solo tramo, basta ordenar por tiempo
+            events = sorted(event for future in futures for event in future.result())
+            output = write_events(video_path, events, args.salida, args.inicio)
+            entries = sum(1 for _, kind in events if kind == ENTRADA)
+            exits = sum(1 for _, kind in events if kind == SALIDA)
+            print(f"{video_path}: {entries} entradas, {exits} salidas -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
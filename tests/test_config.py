@@ -0,0 +1,9 @@
+from config import DEFAULT_CAMERA, default_cameras, load_cameras
+
+
+def test_default_camera_has_the_same_keys_as_configured_cameras():
+    configured, = load_cameras({"camaras": [{"url": "clip.mp4", "left_line": [[0, 0], [1, 0]], "right_line": [[2, 0], [3, 0]]}]})
+    default, = default_cameras()
+    assert default.keys() == configured.keys()
+    assert default["url"] == DEFAULT_CAMERA["url"]
+    assert default["right_line"] == [(362, 150), (500, 150)]
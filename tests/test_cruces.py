@@ -0,0 +1,108 @@
+import numpy as np
+
+from camara.cruces import CrossingEngine, ENTRADA, SALIDA, points_in_polygon
+from camara.pipeline import StreamPipeline
+
+LEFT_LINE = [(190, 150), (339, 150)]
+RIGHT_LINE = [(362, 150), (500, 150)]
+
+
+class FakeEngine:
+    """Motor de inferencia de prueba: cada llamada retorna las cajas del paso siguiente."""
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def infer(self, frame, timeout=None):
+        boxes = self.steps.pop(0)
+        return np.array([[*box, 0.9, 2] for box in boxes], dtype=np.float32).reshape(-1, 6)
+
+
+class PixelEngine:
+    """Motor de prueba que "detecta" el rectángulo claro dibujado en el fotograma."""
+    def infer(self, frame, timeout=None):
+        ys, xs = np.nonzero(frame[:, :, 0])
+        if not len(xs):
+            return np.empty((0, 6), dtype=np.float32)
+        return np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 2]], dtype=np.float32)
+
+
+def box(cx, cy, width=60, height=40):
+    return [cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2]
+
+
+def run(steps, frame_shape=(360, 640, 3), **options):
+    pipeline = StreamPipeline("clip.mp4", FakeEngine(steps), LEFT_LINE, RIGHT_LINE, motion_gate=False, **options)
+    frame = np.zeros(frame_shape, dtype=np.uint8)
+    for index in range(len(steps)):
+        pipeline.process_frame(frame, index * 0.2)
+    return pipeline
+
+
+def test_segment_crossing_both_directions():
+    engine = CrossingEngine()
+    engine.add_line(ENTRADA, (0, 100), (200, 100))
+    hits = engine.segment_crossings([[50, 90], [50, 110], [300, 90]], [[50, 110], [50, 90], [300, 110]])
+    assert hits[:, 0].tolist() == [True, True, False]  # La tercera pasa fuera del segmento
+
+
+def test_directional_line_counts_one_way():
+    engine = CrossingEngine()
+    engine.add_line(ENTRADA, (0, 100), (200, 100), direction=1)
+    down = engine.segment_crossings([[50, 90]], [[50, 110]])[0, 0]
+    up = engine.segment_crossings([[50, 110]], [[50, 90]])[0, 0]
+    assert down != up
+
+
+def test_point_on_line_is_not_counted_again():
+    engine = CrossingEngine()
+    engine.add_line(ENTRADA, (0, 100), (200, 100))
+    assert engine.segment_crossings([[50, 90]], [[50, 100]])[0, 0]
+    assert not engine.segment_crossings([[50, 100]], [[50, 110]])[0, 0]
+
+
+def test_zone_enter_and_exit():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100)]
+    assert points_in_polygon([[50, 50], [150, 50]], square).tolist() == [True, False]
+    engine = CrossingEngine()
+    engine.add_zone(square, on_enter=ENTRADA, on_exit=SALIDA)
+    assert engine.evaluate([[150, 50], [50, 50]], [[50, 50], [150, 50]]) == [(0, ENTRADA), (1, SALIDA)]
+
+
+def test_each_crossing_counted_once():
+    # Baja por la línea de entrada, retrocede y la vuelve a cruzar: sigue siendo un solo vehículo
+    path = [120, 130, 140, 160, 170, 145, 160, 180]
+    pipeline = run([[box(430, y)] for y in path])
+    assert (pipeline.entries, pipeline.exits) == (1, 0)
+
+
+def test_simultaneous_crossings_on_both_lines():
+    steps = [[box(430, y), box(260, 300 - y)] for y in (120, 130, 140, 160, 170)]
+    pipeline = run(steps)
+    assert (pipeline.entries, pipeline.exits) == (1, 1)
+
+
+def test_lines_scale_from_reference_resolution():
+    # Líneas dibujadas para 640x360 sobre un substream 4:3: y=150 pasa a y=200
+    path = [120, 130, 140, 160, 170]
+    assert run([[box(430, y)] for y in path], frame_shape=(480, 640, 3), reference_size=(640, 360)).entries == 0
+    path = [170, 180, 190, 210, 220]
+    assert run([[box(430, y)] for y in path], frame_shape=(480, 640, 3), reference_size=(640, 360)).entries == 1
+
+
+def test_car_arriving_after_idle_period_is_counted():
+    # Frecuencias de config.json: con la entrada vacía el detector baja a 1 Hz, pero el filtro de movimiento
+    # ve cada fotograma y despierta al detector apenas el auto entra, antes de que cruce
+    pipeline = StreamPipeline(
+        "clip.mp4", PixelEngine(), LEFT_LINE, RIGHT_LINE, detection_hz=5, active_hz=10, idle_hz=1, motion_gate=True
+    )
+    fps = 25
+    for index in range(8 * fps):
+        timestamp = index / fps
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        if timestamp >= 5.0:  # 5 s de entrada vacía y luego un auto a 200 px/s hacia la línea de entrada
+            center_y = int(200 * (timestamp - 5.0))
+            x1, y1, x2, y2 = (int(value) for value in box(430, center_y, width=120, height=80))
+            frame[max(0, y1):max(0, y2), x1:x2] = 255
+        pipeline.process_frame(frame, timestamp)
+    assert pipeline.sampler.samples < 8 * 5  # Hubo un tramo muestreado a idle_hz
+    assert (pipeline.entries, pipeline.exits) == (1, 0)
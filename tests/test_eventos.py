@@ -0,0 +1,51 @@
+from database.eventos import EventStore, AJUSTE
+from ocupacion import OccupancyState
+
+CAPACITIES = {"normal": 10, "ejecutivo": 2}
+
+
+def open_state(path):
+    store = EventStore(str(path), flush_interval=0.01)
+    state = OccupancyState.from_data(store.rebuild(), CAPACITIES)
+    state.add_listener(store.on_state_change)
+    return store, state
+
+
+def test_rebuild_from_events_only(tmp_path):
+    store, state = open_state(tmp_path / "eventos.db")
+    for _ in range(3):
+        state.vehicle_entered("camara")
+    state.vehicle_exited("camara")
+    state.adjust("ejecutivo", 1)
+    store.flush()
+    assert store.rebuild() == state.data()
+    store.close()
+
+
+def test_rebuild_matches_live_counts_after_snapshot(tmp_path):
+    path = tmp_path / "eventos.db"
+    store, state = open_state(path)
+    for _ in range(4):
+        state.vehicle_entered("camara")
+    state.snapshot(store, {"hora_inicio_administrativo": 8})
+    state.vehicle_exited("camara")
+    state.set("ejecutivo", 2, AJUSTE, "manual")
+    live = state.data()
+    store.close()
+
+    store, state = open_state(path)
+    rebuilt = store.rebuild()
+    assert rebuilt["hora_inicio_administrativo"] == 8
+    assert {key: value for key, value in rebuilt.items() if key.startswith("ocupados_")} == live
+    assert state.data() == live
+    store.close()
+
+
+def test_snapshot_between_events_keeps_every_event(tmp_path):
+    store, state = open_state(tmp_path / "eventos.db")
+    for _ in range(5):
+        state.vehicle_entered("camara")
+        state.snapshot(store)
+    store.flush()
+    assert store.rebuild()["ocupados_normal"] == 5
+    store.close()
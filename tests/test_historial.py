@@ -0,0 +1,45 @@
+import pytest
+
+from database.eventos import EventStore, ENTRADA, SALIDA, connect
+from database.historial import OccupancyHistory, bucket_start, MINUTO, HORA, DIA
+
+BASE = bucket_start(1_760_000_000, DIA)  # Medianoche local: los intervalos de las tres resoluciones coinciden
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = EventStore(str(tmp_path / "eventos.db"))
+    history = OccupancyHistory(store, {})  # Sin niveles iniciales: el historial empieza con el primer evento
+    yield history
+    store.hooks.remove(history.on_commit)  # Al cerrar, el hook avanzaría con el reloj real desde BASE
+    store.close()
+
+
+def commit(history, events, now):
+    """Aplica un lote como lo haría el hilo escritor de EventStore, con un reloj fijo."""
+    connection = connect(history.file_path)
+    with connection:
+        history.on_commit(connection, [(BASE + ts, tipo, "camara", "normal", delta) for ts, tipo, delta in events], BASE + now)
+    connection.close()
+
+
+def test_minute_hour_and_day_rollups_across_commits(history):
+    # normal: 1 desde el segundo 10, 2 desde el 70, 1 desde el 130; el segundo lote actualiza intervalos ya escritos
+    commit(history, [(10, ENTRADA, 1), (70, ENTRADA, 1)], now=100)
+    commit(history, [(130, SALIDA, -1)], now=180)
+
+    minutes = history.query("normal", MINUTO, BASE, BASE + 180)
+    assert [(start - BASE, low, high) for start, low, high, _ in minutes] == [(0, 1, 1), (60, 1, 2), (120, 1, 2)]
+    assert [average for _, _, _, average in minutes] == pytest.approx([1.0, 110 / 60, 70 / 60])
+
+    for resolution in (HORA, DIA):
+        (start, low, high, average), = history.query("normal", resolution, BASE, BASE + 180)
+        assert (start, low, high) == (BASE, 1, 2)
+        assert average == pytest.approx(230 / 170)
+
+
+def test_idle_commit_extends_the_current_level(history):
+    commit(history, [(0, ENTRADA, 1)], now=30)
+    commit(history, [], now=90)
+    minutes = history.query("normal", MINUTO, BASE, BASE + 90)
+    assert [(start - BASE, low, high, average) for start, low, high, average in minutes] == [(0, 1, 1, 1.0), (60, 1, 1, 1.0)]
@@ -0,0 +1,33 @@
+from camara.indice_espacial import RecentCrossingIndex
+
+
+def test_finds_recent_crossing_nearby():
+    index = RecentCrossingIndex(radius=20, window=1.0)
+    index.insert(100, 100, 10.0)
+    assert index.query(110, 95, 10.5)
+    assert index.query(119, 119, 10.5)  # Celda vecina
+
+
+def test_ignores_far_crossings():
+    index = RecentCrossingIndex(radius=20, window=1.0)
+    index.insert(100, 100, 10.0)
+    assert not index.query(121, 100, 10.5)
+    assert not index.query(100, 300, 10.5)
+
+
+def test_crossings_expire_after_window():
+    index = RecentCrossingIndex(radius=20, window=1.0)
+    index.insert(100, 100, 10.0)
+    assert not index.query(100, 100, 11.0)
+    assert len(index) == 0  # La consulta descarta las entradas vencidas
+
+
+def test_ring_overwrites_oldest_slot():
+    index = RecentCrossingIndex(radius=20, window=100.0, capacity=2)
+    index.insert(100, 100, 1.0)
+    index.insert(300, 100, 2.0)
+    index.insert(500, 100, 3.0)
+    assert not index.query(100, 100, 3.0)
+    assert index.query(300, 100, 3.0)
+    assert index.query(500, 100, 3.0)
+    assert len(index) == 2
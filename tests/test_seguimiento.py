@@ -0,0 +1,48 @@
+import numpy as np
+
+from camara.seguimiento import VehicleTracker, iou_matrix
+
+
+def box(cx, cy, width=60, height=40):
+    return [cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2]
+
+
+def test_iou_matrix():
+    iou = iou_matrix([box(100, 100)], [box(100, 100), box(130, 100), box(400, 400)])
+    assert np.allclose(iou[0], [1.0, 30 * 40 / (2 * 60 * 40 - 30 * 40), 0.0])
+
+
+def test_keeps_id_while_moving():
+    tracker = VehicleTracker()
+    ids, _, _ = tracker.update([box(100, 100), box(300, 100)], 0.0)
+    for step in range(1, 6):
+        moved_ids, prev, centers = tracker.update([box(100, 100 + 10 * step), box(300, 100 + 10 * step)], step * 0.2)
+        assert moved_ids.tolist() == ids.tolist()
+        assert np.allclose(prev[:, 1], 100 + 10 * (step - 1))
+        assert np.allclose(centers[:, 1], 100 + 10 * step)
+
+
+def test_new_track_starts_without_displacement():
+    tracker = VehicleTracker()
+    ids, prev, centers = tracker.update([box(100, 100)], 0.0)
+    assert ids.tolist() == [1]
+    assert np.array_equal(prev, centers)
+
+
+def test_tracks_expire_after_max_age():
+    tracker = VehicleTracker(max_age=1.0)
+    tracker.update([box(100, 100)], 0.0)
+    tracker.update([], 0.5)
+    assert len(tracker) == 1
+    tracker.update([], 1.5)
+    assert len(tracker) == 0
+    ids, _, _ = tracker.update([box(100, 100)], 1.6)
+    assert ids.tolist() == [2]  # La pista vencida no se revive
+
+
+def test_memory_is_bounded():
+    tracker = VehicleTracker(max_tracks=4)
+    for step in range(10):
+        tracker.update([box(100 + 200 * step, 100)], step * 0.01)
+    assert len(tracker) == 4
+    assert tracker.live_ids() == {7, 8, 9, 10}  # Se conservan las vistas más recientemente